@@ -1,17 +1,88 @@
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-import pandas as pd
-import geopandas as gpd
-from shapely.geometry import Polygon, Point, box
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
+from __future__ import annotations
+import time
+MODULE_STARTED = time.time()  # When this module started importing, for the startup report
+import importlib
+import importlib.util
 import numpy as np
 import os
-from typing import Dict, List, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Tuple, Optional
 import re
 import sys
-from matplotlib.colors import to_rgb
+import json
+import hashlib
+import shutil
+import math
+import tracemalloc
+import queue
+import threading
+import urllib.error
+import urllib.request
+from collections import Counter, OrderedDict, deque
+from functools import lru_cache
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+# Heavy libraries
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access.
+    pandas, geopandas, shapely and matplotlib take about a second to import,
+    so they are not imported before the window is on screen. tkinter is only
+    imported by the GUI, so the command-line tools run without Tk.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+pd = LazyModule('pandas')
+gpd = LazyModule('geopandas')
+shapely = LazyModule('shapely')
+mpath = LazyModule('matplotlib.path')
+tk = LazyModule('tkinter')
+ttk = LazyModule('tkinter.ttk')
+filedialog = LazyModule('tkinter.filedialog')
+messagebox = LazyModule('tkinter.messagebox')
+
+if TYPE_CHECKING:  # Only named in annotations
+    from matplotlib.collections import PathCollection
+    from pyproj import Transformer
+
+def warm_up_imports():
+    """
+    Import the heavy libraries ahead of use (run on a background thread once
+    the window is showing). The import statements here also let PyInstaller
+    find the modules LazyModule imports by name.
+    """
+    try:
+        import pandas  # noqa: F401
+        import geopandas  # noqa: F401
+        import shapely  # noqa: F401
+        import shapely.geometry.polygon  # noqa: F401
+        import pyproj  # noqa: F401
+        import matplotlib.figure  # noqa: F401
+        import matplotlib.path  # noqa: F401
+        import matplotlib.collections  # noqa: F401
+        import matplotlib.backends.backend_agg  # noqa: F401
+        from PIL import Image  # noqa: F401
+    except Exception as e:
+        print(f"Warning: Could not preload libraries: {str(e)}")
+
+def import_rasterio():
+    """rasterio, or None when it isn't installed (only needed for terrain relief from a DEM)"""
+    try:
+        import rasterio
+        import rasterio.enums
+        import rasterio.fill
+        import rasterio.transform
+        import rasterio.vrt
+    except ImportError:
+        return None
+    return rasterio
 
 # Montana Dot Map Generator
 # This application generates dot maps for Montana using lat/long data
@@ -19,13 +90,13 @@ from matplotlib.colors import to_rgb
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
-    import sys, os
     if hasattr(sys, '_MEIPASS'):
         return os.path.join(sys._MEIPASS, relative_path)
-    return os.path.join(os.path.abspath("."), relative_path)
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), relative_path)
 
+@lru_cache(maxsize=None)
 def get_icon_path():
-    """Get the path to the application icon"""
+    """Get the path to the application icon (resolved once per run)"""
     try:
         # First try the .ico file
         if getattr(sys, 'frozen', False):
@@ -50,20 +121,1438 @@ def get_icon_path():
         print(f"Warning: Error getting icon path: {str(e)}")
         return None
 
+# On-disk caches
+# Bump when the layout of anything written to the cache directory changes
+CACHE_FORMAT_VERSION = 2
+
+def get_cache_dir(*parts):
+    """
+    Get a writable cache directory, creating it if needed.
+    The PyInstaller bundle is read-only (and unpacked to a new temp folder on
+    every run), so caches live in the user's home folder instead.
+    """
+    base_path = os.environ.get('MONTANA_DOT_MAPPER_CACHE') or \
+        os.path.join(os.path.expanduser('~'), '.montana_dot_mapper', 'cache')
+    path = os.path.join(base_path, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def file_sha256(path, block_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_fingerprint(path, with_hash=True):
+    """Name, size, mtime and (optionally) content hash identifying a source file"""
+    stat = os.stat(path)
+    fingerprint = {
+        'name': os.path.basename(path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+    }
+    if with_hash:
+        fingerprint['sha256'] = file_sha256(path)
+    return fingerprint
+
+def write_cache_meta(meta_path, sources, **extra):
+    """Record the fingerprints of the files a cache entry was built from"""
+    meta = {
+        'version': CACHE_FORMAT_VERSION,
+        'sources': [file_fingerprint(path) for path in sources],
+    }
+    meta.update(extra)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+def cache_meta_matches(meta_path, sources):
+    """
+    Check whether a cache entry was built from the given source files.
+    Size and mtime are checked first; only when the mtime differs is the
+    content hash compared, and a match refreshes the stored mtime.
+    """
+    if not os.path.exists(meta_path):
+        return False
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        recorded = meta['sources']
+        if meta.get('version') != CACHE_FORMAT_VERSION or len(recorded) != len(sources):
+            return False
+        
+        touched = False
+        for path, entry in zip(sources, recorded):
+            current = file_fingerprint(path, with_hash=False)
+            if current['name'] != entry['name'] or current['size'] != entry['size']:
+                return False
+            if current['mtime'] != entry['mtime']:
+                if file_sha256(path) != entry['sha256']:
+                    return False
+                entry['mtime'] = current['mtime']
+                touched = True
+        
+        if touched:
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+        return True
+    except Exception as e:
+        print(f"Warning: Could not read cache metadata {meta_path}: {str(e)}")
+        return False
+
+# Diagnostics
+DIAGNOSTICS_ENV = 'MONTANA_DOT_MAPPER_DIAGNOSTICS'  # Set to 1 (or "timings", without memory) to record from startup
+DIAGNOSTICS_LOG_MAX_BYTES = 5 * 1024 * 1024
+DIAGNOSTICS_LOG_BACKUPS = 3  # Rotated log files kept next to the current one
+DIAGNOSTICS_RECENT_SPANS = 500  # Spans kept in memory for the diagnostics window
+
+class _NullSpan:
+    """Returned by Diagnostics.span while recording is off, so instrumented code costs one call"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **fields):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    """
+    One timed stage. ``set`` adds fields such as ``rows_out`` to its record.
+    Peak memory is the highest memory traced by tracemalloc while the span
+    was open, above what was in use when it started. tracemalloc's peak is
+    process-wide, so it is only reset while no span is open on another
+    thread; a span that overlaps one on another thread is recorded with
+    ``peak_shared`` and its peak may include memory used by that job (or
+    before the span started). Before Python 3.9 every peak is shared.
+    """
+    def __init__(self, diagnostics, operation, stage, fields):
+        self._diagnostics = diagnostics
+        self._shared = False
+        self.record = {'operation': operation, 'stage': stage}
+        self.record.update(fields)
+
+    def set(self, **fields):
+        self.record.update(fields)
+
+    def __enter__(self):
+        self._stack = self._diagnostics._stack()
+        self._tracing = tracemalloc.is_tracing()
+        self._peak = 0
+        with self._diagnostics._lock:
+            open_spans = self._diagnostics._open_spans
+            open_spans.add(self)
+            if len(open_spans) > len(self._stack) + 1:
+                # Spans are open on another thread too
+                for span in open_spans:
+                    span._shared = True
+            if self._tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                # Resetting the peak below would lose the enclosing span's peak so far
+                if self._stack:
+                    self._stack[-1]._peak = max(self._stack[-1]._peak, peak)
+                if not hasattr(tracemalloc, 'reset_peak'):
+                    # Python before 3.9 can't reset the peak, so it may come from before the span
+                    self._shared = True
+                elif not self._shared:
+                    tracemalloc.reset_peak()
+                self._memory_start = current
+        self.record['depth'] = len(self._stack)
+        self._stack.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        self._stack.pop()
+        with self._diagnostics._lock:
+            self._diagnostics._open_spans.discard(self)
+        self.record['seconds'] = round(seconds, 6)
+        if self._tracing and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            self._peak = max(self._peak, peak)
+            self.record['peak_bytes'] = max(0, self._peak - self._memory_start)
+            self.record['net_bytes'] = current - self._memory_start
+            if self._shared:
+                self.record['peak_shared'] = True
+            if self._stack:
+                self._stack[-1]._peak = max(self._stack[-1]._peak, self._peak)
+        if exc_type is not None:
+            self.record['error'] = exc_type.__name__
+        self._diagnostics._record(self.record)
+        return False
+
+class Diagnostics:
+    """
+    Stage timings for the app. While enabled, every ``span`` records its wall
+    time, the rows going in and out and its peak memory (tracemalloc), appends
+    the record to a rotating JSON-lines log and keeps the most recent ones for
+    the diagnostics window. While disabled ``span`` returns a shared no-op
+    object and nothing is traced.
+    Tracing memory slows allocation-heavy stages (reading Excel several
+    times over), so it can be switched off to record timings alone.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = True
+        self.log_path = None
+        self.recent = deque(maxlen=DIAGNOSTICS_RECENT_SPANS)
+        self.version = 0  # Bumped for every record, so the window can poll for changes
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open_spans = set()  # Spans open on any thread, to tell when tracemalloc's peak is shared
+        self._handler = None
+        self._started_tracemalloc = False
+
+    def enable(self, log_path=None):
+        """Start recording, appending to ``log_path`` (default: the diagnostics cache folder)"""
+        if self.enabled:
+            return
+        import logging
+        import logging.handlers
+        self.log_path = log_path or os.path.join(get_cache_dir('diagnostics'), 'diagnostics.jsonl')
+        self._handler = logging.handlers.RotatingFileHandler(
+            self.log_path,
+            maxBytes=DIAGNOSTICS_LOG_MAX_BYTES,
+            backupCount=DIAGNOSTICS_LOG_BACKUPS,
+            encoding='utf-8'
+        )
+        self._handler.setFormatter(logging.Formatter('%(message)s'))
+        self._logger = logging.getLogger('montana_dot_mapper.diagnostics')
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(self._handler)
+        self.enabled = True
+        self._update_tracing()
+
+    def disable(self):
+        """Stop recording (the spans recorded so far stay in ``recent``)"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._logger.removeHandler(self._handler)
+        self._handler.close()
+        self._handler = None
+        self._update_tracing()
+
+    def set_trace_memory(self, trace_memory):
+        self.trace_memory = trace_memory
+        self._update_tracing()
+
+    def _update_tracing(self):
+        """Run tracemalloc only while recording with memory tracing on (unless someone else started it)"""
+        wanted = self.enabled and self.trace_memory
+        if wanted and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        elif not wanted and self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def span(self, operation, stage, **fields):
+        """Context manager timing one stage of ``operation``, e.g. ``span('load', 'read')``"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, operation, stage, fields)
+
+    def record(self, operation, stage, seconds, **fields):
+        """Record a stage timed without a span (such as startup, which begins before the app does)"""
+        if self.enabled:
+            self._record(dict(fields, operation=operation, stage=stage, depth=0, seconds=round(seconds, 6)))
+
+    def clear(self):
+        with self._lock:
+            self.recent.clear()
+            self.version += 1
+
+    def snapshot(self) -> Tuple[int, List[Dict]]:
+        """The current version and a copy of the recent records, oldest first"""
+        with self._lock:
+            return self.version, list(self.recent)
+
+    def _stack(self) -> List[Span]:
+        """Spans open on the calling thread, outermost first"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, record):
+        record = dict(record, time=time.strftime('%Y-%m-%dT%H:%M:%S'), thread=threading.current_thread().name)
+        with self._lock:
+            self.recent.append(record)
+            self.version += 1
+            handler = self._handler
+        if handler is not None:
+            self._logger.info(json.dumps(record, default=str))
+
+diagnostics = Diagnostics()
+
+# Coordinate parsing
+# Reasons a specimen can be rejected while converting its coordinates
+COORD_OK = 0
+COORD_MISSING = 1
+COORD_UNPARSEABLE = 2
+COORD_OUT_OF_BOUNDS = 3
+
+COORD_REJECTION_REASONS = {
+    COORD_MISSING: "missing coordinates",
+    COORD_UNPARSEABLE: "unreadable coordinates",
+    COORD_OUT_OF_BOUNDS: "outside Montana's bounding box",
+}
+
+# Montana is roughly between 44°N to 49°N and 104°W to 116°W
+MONTANA_LAT_RANGE = (44, 49)
+MONTANA_LONG_RANGE = (104, 116)
+
+# Degrees, minutes and optional seconds, e.g. 44°41.576' or 46°41'59"
+DMS_PATTERN = r"^\s*(\d+)[°\s]+(\d+(?:\.\d+)?)['′’]?\s*(\d*(?:\.\d+)?)[\"″”]?"
+
+class ParsedCoordinates(NamedTuple):
+    """Decimal coordinates for a block of specimen rows.
+    
+    Rows that could not be used have NaN in ``lon``/``lat`` and one of the
+    ``COORD_*`` rejection codes in ``status``.
+    """
+    lon: np.ndarray
+    lat: np.ndarray
+    status: np.ndarray
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.status == COORD_OK
+
+    def rejection_counts(self) -> Dict[str, int]:
+        """Number of rejected rows per reason (reasons with no rows are omitted)"""
+        counts = np.bincount(self.status, minlength=len(COORD_REJECTION_REASONS) + 1)
+        return {
+            reason: int(counts[code])
+            for code, reason in COORD_REJECTION_REASONS.items()
+            if counts[code]
+        }
+
+    def take(self, rows) -> "ParsedCoordinates":
+        """Select a subset of rows by position"""
+        return ParsedCoordinates(self.lon[rows], self.lat[rows], self.status[rows])
+
+def _stripped_text(values: pd.Series) -> pd.Series:
+    """Stripped string values; NaN for anything that is not a string"""
+    if not (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)):
+        return pd.Series(np.nan, index=values.index, dtype=object)
+    return values.str.strip()
+
+def coordinates_to_decimal(values: pd.Series) -> np.ndarray:
+    """
+    Convert a column of coordinates to decimal degrees.
+    Numbers are used as-is, strings may be in DMS format (e.g. '44°41.576'')
+    or plain decimals. Anything else becomes NaN.
+    """
+    text = _stripped_text(values)
+    is_text = text.notna().to_numpy()
+    
+    # Non-string cells are either numbers or unusable
+    result = pd.to_numeric(values.where(~is_text), errors='coerce').to_numpy(dtype=float, copy=True)
+    
+    if is_text.any():
+        text = text[is_text]
+        parts = text.str.extract(DMS_PATTERN)
+        deg = pd.to_numeric(parts[0], errors='coerce')
+        min_ = pd.to_numeric(parts[1], errors='coerce')
+        sec = pd.to_numeric(parts[2].replace('', np.nan), errors='coerce').fillna(0.0)
+        dms = deg + min_ / 60 + sec / 3600
+        decimal = pd.to_numeric(text, errors='coerce')
+        result[is_text] = dms.where(parts[0].notna(), decimal).to_numpy(dtype=float)
+    
+    return result
+
+def parse_coordinates(data: pd.DataFrame) -> ParsedCoordinates:
+    """
+    Convert the lat/lat_dir/long/long_dir columns of a specimen table to
+    decimal longitude/latitude in one pass over whole columns.
+    """
+    lat_raw = data['lat']
+    long_raw = data['long']
+    
+    status = np.full(len(data), COORD_OK, dtype=np.int8)
+    missing = (lat_raw.isna() | long_raw.isna()).to_numpy()
+    status[missing] = COORD_MISSING
+    
+    lat = coordinates_to_decimal(lat_raw)
+    lon = coordinates_to_decimal(long_raw)
+    status[~missing & (np.isnan(lat) | np.isnan(lon))] = COORD_UNPARSEABLE
+    
+    # Directions default to N/W for Montana when missing or unrecognised
+    lat_dir = _stripped_text(data['lat_dir']).str.upper()
+    long_dir = _stripped_text(data['long_dir']).str.upper()
+    lat = np.where((lat_dir == 'S').to_numpy(), -lat, lat)
+    lon = np.where((long_dir == 'E').to_numpy(), lon, -lon)
+    
+    # Validate the coordinates are somewhat reasonable
+    with np.errstate(invalid='ignore'):
+        abs_lat = np.abs(lat)
+        abs_lon = np.abs(lon)
+        in_box = ((abs_lat >= MONTANA_LAT_RANGE[0]) & (abs_lat <= MONTANA_LAT_RANGE[1]) &
+                  (abs_lon >= MONTANA_LONG_RANGE[0]) & (abs_lon <= MONTANA_LONG_RANGE[1]))
+    status[(status == COORD_OK) & ~in_box] = COORD_OUT_OF_BOUNDS
+    
+    valid = status == COORD_OK
+    lon = np.where(valid, lon, np.nan)
+    lat = np.where(valid, lat, np.nan)
+    return ParsedCoordinates(lon, lat, status)
+
+COORDINATE_COLUMNS = ['lat', 'lat_dir', 'long', 'long_dir']
+
+class CoordinateCache:
+    """
+    Session-wide table of parsed coordinates keyed on the raw
+    (lat, lat_dir, long, long_dir) values of a row. Specimen sheets repeat the
+    same localities many times, so each distinct key is parsed only once.
+    """
+    def __init__(self):
+        self._table: Dict[tuple, Tuple[float, float, int]] = {}
+
+    def __len__(self):
+        return len(self._table)
+
+    def parse(self, data: pd.DataFrame) -> ParsedCoordinates:
+        """Parsed coordinates for every row of ``data``, parsing only unseen keys"""
+        raw = data[COORDINATE_COLUMNS].astype(object)
+        # None hashes consistently, unlike the many different NaN objects
+        raw = raw.where(raw.notna(), None)
+        keys = pd.Series(list(zip(*(raw[col].tolist() for col in COORDINATE_COLUMNS))), dtype=object)
+        codes, uniques = pd.factorize(keys)
+        
+        new_keys = [key for key in uniques if key not in self._table]
+        if new_keys:
+            parsed = parse_coordinates(pd.DataFrame(new_keys, columns=COORDINATE_COLUMNS))
+            self._table.update(zip(new_keys, zip(parsed.lon.tolist(), parsed.lat.tolist(), parsed.status.tolist())))
+        
+        values = [self._table[key] for key in uniques]
+        lon = np.array([v[0] for v in values], dtype=float)
+        lat = np.array([v[1] for v in values], dtype=float)
+        status = np.array([v[2] for v in values], dtype=np.int8)
+        return ParsedCoordinates(lon[codes], lat[codes], status[codes])
+
+def format_rejection_counts(counts: Dict[str, int]) -> str:
+    """Human readable summary such as '12 missing coordinates, 3 unreadable coordinates'"""
+    return ", ".join(f"{count:,} {reason}" for reason, count in counts.items())
+
+# Montana county layer
+COUNTY_SHAPEFILE = "shapefiles/cb_2021_us_county_5m.shp"
+MONTANA_STATEFP = '30'
+MONTANA_CRS = "EPSG:32100"  # Montana State Plane
+WGS84_CRS = "EPSG:4326"  # Specimen lat/long
+WEB_MERCATOR_CRS = "EPSG:3857"  # Map display
+
+# Projected coordinates stored for every specimen: CRS -> (x column, y column)
+PROJECTED_COLUMNS = {
+    WEB_MERCATOR_CRS: ('mercator_x', 'mercator_y'),
+    MONTANA_CRS: ('state_plane_x', 'state_plane_y'),
+}
+
+@lru_cache(maxsize=None)
+def get_transformer(source_crs, target_crs) -> Transformer:
+    """Shared x/y (lon/lat) ordered transformer; building one is far slower than using it"""
+    from pyproj import Transformer
+    return Transformer.from_crs(source_crs, target_crs, always_xy=True)
+
+def project_xy(lon, lat, crs=WEB_MERCATOR_CRS) -> Tuple[np.ndarray, np.ndarray]:
+    """Project lon/lat arrays to ``crs`` in one call (NaN stays NaN)"""
+    x, y = get_transformer(WGS84_CRS, crs).transform(np.asarray(lon, dtype=float), np.asarray(lat, dtype=float))
+    return np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+
+def _shapefile_components(shapefile_path):
+    """The .shp and its sidecar files that affect what gets read"""
+    base, _ = os.path.splitext(shapefile_path)
+    return [base + ext for ext in ('.shp', '.shx', '.dbf', '.prj', '.cpg') if os.path.exists(base + ext)]
+
+def load_montana_counties(shapefile_path=None):
+    """
+    Load the Montana counties (projected to Montana State Plane) and the
+    dissolved state outline.
+    Both are kept in a GeoParquet cache checked against the source shapefile,
+    so only the first load has to read and filter all ~3,200 US counties.
+    """
+    shapefile_path = shapefile_path or resource_path(COUNTY_SHAPEFILE)
+    sources = _shapefile_components(shapefile_path)
+    cache_dir = get_cache_dir('counties')
+    counties_path = os.path.join(cache_dir, 'montana_counties.parquet')
+    outline_path = os.path.join(cache_dir, 'montana_outline.parquet')
+    meta_path = os.path.join(cache_dir, 'montana_counties.json')
+    
+    if cache_meta_matches(meta_path, sources):
+        try:
+            return gpd.read_parquet(counties_path), gpd.read_parquet(outline_path)
+        except Exception as e:
+            print(f"Warning: Could not read county cache, rebuilding it: {str(e)}")
+    
+    all_counties = gpd.read_file(shapefile_path)
+    counties = all_counties[all_counties['STATEFP'] == MONTANA_STATEFP].to_crs(MONTANA_CRS)
+    counties = counties.reset_index(drop=True)
+    outline = counties[['geometry']].dissolve()
+    
+    try:
+        counties.to_parquet(counties_path)
+        outline.to_parquet(outline_path)
+        write_cache_meta(meta_path, sources)
+    except Exception as e:
+        print(f"Warning: Could not write county cache: {str(e)}")
+    
+    return counties, outline
+
+class MontanaBoundary:
+    """
+    Dissolved Montana outline, reprojected once per CRS and prepared for
+    repeated bulk point-in-polygon tests.
+    Each CRS also gets a coarse grid classifying cells as fully inside, fully
+    outside or on the border, so only points in border cells need the exact test.
+    """
+    GRID_SIZE = 64
+    
+    CELL_OUTSIDE = 0
+    CELL_INSIDE = 1
+    CELL_BORDER = 2
+
+    def __init__(self, outline: gpd.GeoDataFrame, crs_list=(WGS84_CRS, WEB_MERCATOR_CRS, MONTANA_CRS)):
+        self._outline = outline
+        self._geometries = {}
+        self._grids = {}
+        for crs in crs_list:
+            self.geometry(crs)
+
+    def geometry(self, crs):
+        """The (prepared) Montana outline in the given CRS"""
+        if crs not in self._geometries:
+            geometry = self._outline.to_crs(crs).geometry.iloc[0]
+            shapely.prepare(geometry)
+            self._geometries[crs] = geometry
+            self._grids[crs] = self._build_grid(geometry)
+        return self._geometries[crs]
+
+    def _build_grid(self, geometry):
+        xmin, ymin, xmax, ymax = geometry.bounds
+        n = self.GRID_SIZE
+        xs = np.linspace(xmin, xmax, n + 1)
+        ys = np.linspace(ymin, ymax, n + 1)
+        # cells[iy, ix] covers xs[ix]..xs[ix + 1], ys[iy]..ys[iy + 1]
+        x0, y0 = np.meshgrid(xs[:-1], ys[:-1])
+        x1, y1 = np.meshgrid(xs[1:], ys[1:])
+        cells = shapely.box(x0, y0, x1, y1)
+        
+        classes = np.full(cells.shape, self.CELL_BORDER, dtype=np.int8)
+        classes[shapely.contains_properly(geometry, cells)] = self.CELL_INSIDE
+        classes[~shapely.intersects(geometry, cells)] = self.CELL_OUTSIDE
+        return (xmin, ymin, xmax, ymax), classes
+
+    def contains_xy(self, x, y, crs=WGS84_CRS) -> np.ndarray:
+        """
+        Boolean mask of the points strictly inside Montana
+        (same result as ``Point(x, y).within(outline)``; NaN coordinates are outside).
+        """
+        geometry = self.geometry(crs)
+        (xmin, ymin, xmax, ymax), classes = self._grids[crs]
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        result = np.zeros(x.shape, dtype=bool)
+        
+        # Anything outside the bounding box (or NaN) is outside
+        candidates = np.flatnonzero((x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax))
+        if len(candidates) == 0:
+            return result
+        
+        n = self.GRID_SIZE
+        cx, cy = x[candidates], y[candidates]
+        ix = np.clip(((cx - xmin) / (xmax - xmin) * n).astype(np.intp), 0, n - 1)
+        iy = np.clip(((cy - ymin) / (ymax - ymin) * n).astype(np.intp), 0, n - 1)
+        cell = classes[iy, ix]
+        
+        result[candidates[cell == self.CELL_INSIDE]] = True
+        border = cell == self.CELL_BORDER
+        if border.any():
+            result[candidates[border]] = shapely.contains_xy(geometry, cx[border], cy[border])
+        return result
+
+def polygon_path(geometry) -> mpath.Path:
+    """
+    Compound matplotlib Path for a Polygon or MultiPolygon: every part, with
+    holes. Rings are oriented (exteriors counter-clockwise, holes clockwise)
+    so holes stay unfilled.
+    """
+    vertices = []
+    codes = []
+    for part in shapely.get_parts(geometry):
+        part = shapely.geometry.polygon.orient(part, sign=1.0)
+        for ring in [part.exterior, *part.interiors]:
+            xy = np.asarray(ring.coords)[:, :2]
+            ring_codes = np.full(len(xy), mpath.Path.LINETO, dtype=mpath.Path.code_type)
+            ring_codes[0] = mpath.Path.MOVETO
+            ring_codes[-1] = mpath.Path.CLOSEPOLY
+            vertices.append(xy)
+            codes.append(ring_codes)
+    if not vertices:
+        return mpath.Path(np.empty((0, 2)))
+    return mpath.Path(np.concatenate(vertices), np.concatenate(codes))
+
+class CountyBaseLayer:
+    """
+    County polygons and the Montana outline in Web Mercator, reprojected once
+    and converted to matplotlib Paths. Each redraw adds a single PathCollection
+    built from the cached paths instead of one fill per county.
+    """
+    def __init__(self, counties: gpd.GeoDataFrame, boundary: MontanaBoundary):
+        counties = counties.to_crs(WEB_MERCATOR_CRS)
+        self.bounds = counties.total_bounds
+        self.county_paths = [polygon_path(geometry) for geometry in counties.geometry]
+        self.outline_paths = [polygon_path(boundary.geometry(WEB_MERCATOR_CRS))]
+
+    def collection(self, show_county_lines=True, **kwargs) -> PathCollection:
+        """County polygons (or only Montana's outline) as one collection"""
+        from matplotlib.collections import PathCollection
+        paths = self.county_paths if show_county_lines else self.outline_paths
+        return PathCollection(paths, **kwargs)
+
+# Topographic background tiles
+TILE_URL = "https://{s}.tile.opentopomap.org/{z}/{x}/{y}.png"
+TILE_ATTRIBUTION = "Map data: © OpenStreetMap contributors, SRTM | Map style: © OpenTopoMap (CC-BY-SA)"
+TILE_SIZE = 256
+TILE_MAX_ZOOM = 17
+WEB_MERCATOR_HALF_WORLD = 20037508.342789244  # Metres from the origin to the edge of the tile grid
+
+def map_extent(bounds, padding=0.05):
+    """The map's (xmin, ymin, xmax, ymax): ``bounds`` padded by a fraction of its width"""
+    pad = (bounds[2] - bounds[0]) * padding
+    return (bounds[0] - pad, bounds[1] - pad, bounds[2] + pad, bounds[3] + pad)
+
+def tile_span(zoom) -> float:
+    """Width of one tile in Web Mercator metres"""
+    return 2 * WEB_MERCATOR_HALF_WORLD / 2 ** zoom
+
+def tile_range(extent, zoom):
+    """Inclusive (x0, x1, y0, y1) XYZ tile indexes covering a Web Mercator extent"""
+    span = tile_span(zoom)
+    last = 2 ** zoom - 1
+    x0 = min(max(int((extent[0] + WEB_MERCATOR_HALF_WORLD) // span), 0), last)
+    x1 = min(max(int((extent[2] + WEB_MERCATOR_HALF_WORLD) // span), 0), last)
+    y0 = min(max(int((WEB_MERCATOR_HALF_WORLD - extent[3]) // span), 0), last)
+    y1 = min(max(int((WEB_MERCATOR_HALF_WORLD - extent[1]) // span), 0), last)
+    return x0, x1, y0, y1
+
+def zoom_for_extent(extent, width_px) -> int:
+    """Smallest zoom whose tiles are at least as detailed as ``width_px`` pixels across the extent"""
+    metres_per_pixel = (extent[2] - extent[0]) / max(width_px, 1)
+    zoom = math.ceil(math.log2(2 * WEB_MERCATOR_HALF_WORLD / (TILE_SIZE * metres_per_pixel)))
+    return min(max(zoom, 0), TILE_MAX_ZOOM)
+
+class TileCache:
+    """
+    Web map tiles in an on-disk z/x/y directory cache (filled on demand or
+    ahead of time with ``seed``), with an in-memory LRU of decoded tiles.
+    Stitched, cropped mosaics are memoised per (extent, zoom, canvas size);
+    one with tiles missing is rebuilt once one of them arrives, or to download them.
+    The tiles are already in Web Mercator, the map's CRS, so no warping is needed.
+    Set MONTANA_DOT_MAPPER_TILE_URL to use another tile server (e.g. a local one).
+    """
+    MEMORY_TILES = 128
+    MEMORY_MOSAICS = 8
+    TIMEOUT = 10
+    RETRY_AFTER = 60  # Seconds to stay offline after a failed download
+
+    def __init__(self, url=None, cache_dir=None):
+        self.url = url or os.environ.get('MONTANA_DOT_MAPPER_TILE_URL') or TILE_URL
+        key = hashlib.sha1(self.url.encode('utf-8')).hexdigest()[:12]
+        self.cache_dir = cache_dir or get_cache_dir('tiles', key)
+        self._tiles = OrderedDict()
+        self._mosaics = OrderedDict()
+        self._lock = threading.Lock()
+        self._offline_until = 0.0
+
+    def tile_path(self, zoom, x, y):
+        return os.path.join(self.cache_dir, str(zoom), str(x), f"{y}.png")
+
+    def download(self, zoom, x, y) -> bool:
+        """Fetch a tile into the disk cache; False if it could not be downloaded"""
+        if time.monotonic() < self._offline_until:
+            return False
+        url = self.url.format(s='abc'[(x + y) % 3], z=zoom, x=x, y=y)
+        request = urllib.request.Request(url, headers={'User-Agent': 'MontanaDotMapper/1.0'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.TIMEOUT) as response:
+                data = response.read()
+        except urllib.error.HTTPError as e:
+            print(f"Warning: Could not download tile {zoom}/{x}/{y}: {str(e)}")
+            return False
+        except Exception as e:
+            # Unreachable server: don't keep waiting on every other tile
+            print(f"Warning: Tile server unavailable, using cached tiles only: {str(e)}")
+            self._offline_until = time.monotonic() + self.RETRY_AFTER
+            return False
+        
+        path = self.tile_path(zoom, x, y)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return True
+
+    def get(self, zoom, x, y, download=True) -> Optional[np.ndarray]:
+        """Decoded RGBA tile from memory, disk or (if ``download``) the tile server"""
+        key = (zoom, x, y)
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                return self._tiles[key]
+        
+        path = self.tile_path(zoom, x, y)
+        if not os.path.exists(path) and not (download and self.download(zoom, x, y)):
+            return None
+        try:
+            from PIL import Image
+            with Image.open(path) as image:
+                tile = np.asarray(image.convert('RGBA'))
+        except Exception as e:
+            print(f"Warning: Could not read cached tile {zoom}/{x}/{y}: {str(e)}")
+            return None
+        
+        with self._lock:
+            self._tiles[key] = tile
+            while len(self._tiles) > self.MEMORY_TILES:
+                self._tiles.popitem(last=False)
+        return tile
+
+    def mosaic(self, extent, size, download=True):
+        """
+        Tiles covering ``extent`` at a zoom matching a ``size`` (width, height)
+        pixel canvas, stitched and cropped to the extent.
+        Returns (RGBA image, (left, right, bottom, top)) for ``imshow``; tiles
+        that are unavailable stay transparent.
+        """
+        extent = tuple(float(v) for v in extent)
+        zoom = zoom_for_extent(extent, size[0])
+        key = (extent, zoom, tuple(size))
+        with self._lock:
+            cached = self._mosaics.get(key)
+            if cached is not None:
+                self._mosaics.move_to_end(key)
+        if cached is not None:
+            result, missing = cached
+            if not missing or (not download and not any(
+                    os.path.exists(self.tile_path(zoom, x, y)) for x, y in missing)):
+                return result
+        
+        x0, x1, y0, y1 = tile_range(extent, zoom)
+        image = np.zeros(((y1 - y0 + 1) * TILE_SIZE, (x1 - x0 + 1) * TILE_SIZE, 4), dtype=np.uint8)
+        missing = []
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                tile = self.get(zoom, x, y, download)
+                if tile is None or tile.shape != (TILE_SIZE, TILE_SIZE, 4):
+                    missing.append((x, y))
+                    continue
+                row, col = (y - y0) * TILE_SIZE, (x - x0) * TILE_SIZE
+                image[row:row + TILE_SIZE, col:col + TILE_SIZE] = tile
+        
+        # Crop the stitched tiles to the extent
+        span = tile_span(zoom)
+        resolution = span / TILE_SIZE
+        left = -WEB_MERCATOR_HALF_WORLD + x0 * span
+        top = WEB_MERCATOR_HALF_WORLD - y0 * span
+        c0 = max(int((extent[0] - left) // resolution), 0)
+        c1 = min(int(math.ceil((extent[2] - left) / resolution)), image.shape[1])
+        r0 = max(int((top - extent[3]) // resolution), 0)
+        r1 = min(int(math.ceil((top - extent[1]) / resolution)), image.shape[0])
+        result = (
+            image[r0:r1, c0:c1],
+            (left + c0 * resolution, left + c1 * resolution, top - r1 * resolution, top - r0 * resolution)
+        )
+        
+        with self._lock:
+            self._mosaics[key] = (result, missing)
+            while len(self._mosaics) > self.MEMORY_MOSAICS:
+                self._mosaics.popitem(last=False)
+        return result
+
+    def source(self, extent, size) -> List:
+        """
+        What the mosaic for ``extent`` and ``size`` is made from (tile server,
+        zoom, extent and tiles not cached yet), to key exports on instead of
+        hashing the image
+        """
+        extent = tuple(float(v) for v in extent)
+        zoom = zoom_for_extent(extent, size[0])
+        x0, x1, y0, y1 = tile_range(extent, zoom)
+        missing = sum(
+            not os.path.exists(self.tile_path(zoom, x, y))
+            for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)
+        )
+        return [self.url, zoom, [round(v, 3) for v in extent], list(size), missing]
+
+    def seed(self, extent, zooms, workers=4, progress=None) -> Dict[str, int]:
+        """Download every tile covering ``extent`` for each zoom level that isn't cached yet"""
+        progress = progress or (lambda message: None)
+        tiles = []
+        for zoom in zooms:
+            x0, x1, y0, y1 = tile_range(extent, zoom)
+            tiles.extend((zoom, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1))
+        
+        counts = {'tiles': len(tiles), 'cached': 0, 'downloaded': 0, 'failed': 0}
+        missing = []
+        for tile in tiles:
+            if os.path.exists(self.tile_path(*tile)):
+                counts['cached'] += 1
+            else:
+                missing.append(tile)
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for done, ok in enumerate(pool.map(lambda tile: self.download(*tile), missing), 1):
+                counts['downloaded' if ok else 'failed'] += 1
+                if done % 100 == 0 or done == len(missing):
+                    progress(f"Downloaded {counts['downloaded']:,} of {len(missing):,} missing tiles...")
+        return counts
+
+# Terrain relief from a local DEM
+HILLSHADE_AZIMUTH = 315  # Sun from the north-west
+HILLSHADE_ALTITUDE = 45
+RELIEF_OPACITY = 0.6  # Darkest shadow, drawn as black over whatever is below
+
+class HillshadeCache:
+    """
+    Hillshaded terrain relief for the map, computed from a local elevation
+    GeoTIFF (any CRS). GDAL warps and downsamples only the part of the DEM
+    inside the map extent straight to the canvas grid, and the shading is
+    computed with vectorized NumPy. Results are cached on disk (and in
+    memory) per (DEM, extent, resolution, sun angle), so drawing the relief
+    afterwards is a single image.
+    """
+    MEMORY_IMAGES = 4
+
+    def __init__(self, dem_path, azimuth=HILLSHADE_AZIMUTH, altitude=HILLSHADE_ALTITUDE,
+                 vertical_exaggeration=1.0):
+        self.dem_path = os.path.abspath(dem_path)
+        self.azimuth = azimuth
+        self.altitude = altitude
+        self.vertical_exaggeration = vertical_exaggeration
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def source(self, extent, size) -> List:
+        """What the relief for ``extent`` and ``size`` is computed from (DEM fingerprint, extent, size and sun)"""
+        fingerprint = file_fingerprint(self.dem_path, with_hash=False)
+        return [
+            self.dem_path, fingerprint['size'], fingerprint['mtime'],
+            [round(v, 3) for v in extent], list(size),
+            self.azimuth, self.altitude, self.vertical_exaggeration
+        ]
+
+    def _cache_path(self, extent, size):
+        key = json.dumps([CACHE_FORMAT_VERSION] + self.source(extent, size))
+        return os.path.join(get_cache_dir('hillshade'), hashlib.sha1(key.encode('utf-8')).hexdigest() + '.npy')
+
+    def _compute(self, extent, size) -> np.ndarray:
+        rasterio = import_rasterio()
+        if rasterio is None:
+            raise RuntimeError("Terrain relief needs the rasterio package (pip install rasterio)")
+        from matplotlib.colors import LightSource
+        width, height = size
+        with rasterio.open(self.dem_path) as src:
+            with rasterio.vrt.WarpedVRT(src, crs=WEB_MERCATOR_CRS, resampling=rasterio.enums.Resampling.bilinear,
+                                        transform=rasterio.transform.from_bounds(*extent, width, height),
+                                        width=width, height=height) as vrt:
+                elevation = vrt.read(1, masked=True).astype(float)
+        
+        # Web Mercator metres are stretched by 1 / cos(latitude); use ground distances
+        center_y = (extent[1] + extent[3]) / 2
+        latitude = 2 * math.atan(math.exp(center_y / 6378137.0)) - math.pi / 2
+        scale = math.cos(latitude)
+        dx = (extent[2] - extent[0]) / width * scale
+        dy = (extent[3] - extent[1]) / height * scale
+        
+        missing = np.ma.getmaskarray(elevation)
+        filled = elevation.filled(0.0)
+        if missing.any() and not missing.all():
+            # Continue the terrain into the nodata from the nearest valid elevations, so the
+            # edge of a clipped or partial DEM isn't shaded as a cliff down to a constant
+            filled = rasterio.fill.fillnodata(filled, mask=(~missing).astype(np.uint8), max_search_distance=max(width, height))
+        shade = LightSource(azdeg=self.azimuth, altdeg=self.altitude).hillshade(
+            filled, vert_exag=self.vertical_exaggeration, dx=dx, dy=dy)
+        
+        # Black with opacity growing into the shadows, transparent where there is no data
+        image = np.zeros((height, width, 4), dtype=np.uint8)
+        image[..., 3] = np.round((1.0 - shade) * RELIEF_OPACITY * 255).astype(np.uint8)
+        image[missing, 3] = 0
+        return image
+
+    def relief(self, extent, size, compute=True):
+        """
+        Relief for an (xmin, ymin, xmax, ymax) Web Mercator extent on a
+        (width, height) pixel canvas, as (RGBA image, (left, right, bottom, top))
+        for ``imshow``. Returns None if it isn't cached and ``compute`` is False.
+        """
+        extent = tuple(float(v) for v in extent)
+        size = (max(int(size[0]), 1), max(int(size[1]), 1))
+        key = (extent, size)
+        with self._lock:
+            if key in self._images:
+                self._images.move_to_end(key)
+                return self._images[key]
+        
+        cache_path = self._cache_path(extent, size)
+        image = None
+        if os.path.exists(cache_path):
+            try:
+                image = np.load(cache_path)
+            except Exception as e:
+                print(f"Warning: Could not read hillshade cache, recomputing it: {str(e)}")
+        if image is None:
+            if not compute:
+                return None
+            image = self._compute(extent, size)
+            try:
+                np.save(cache_path, image)
+            except Exception as e:
+                print(f"Warning: Could not write hillshade cache: {str(e)}")
+        
+        result = (image, (extent[0], extent[2], extent[1], extent[3]))
+        with self._lock:
+            self._images[key] = result
+            while len(self._images) > self.MEMORY_IMAGES:
+                self._images.popitem(last=False)
+        return result
+
+# Taxonomy index
+TAXON_COLUMNS = ['family', 'genus', 'species']
+
+def _is_blank_taxon(name) -> bool:
+    """Empty names (and 'nan' left over from str conversion) are never offered in the dropdowns"""
+    return not name or name == 'nan'
+
+def _taxon_codes(values: pd.Series):
+    """Integer codes (-1 for missing) and the names they refer to"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    return pd.factorize(values)
+
+class TaxonomyIndex:
+    """
+    Hierarchical family → genus → species → row positions index over the
+    (normalised, lower case) taxon columns, built once per workbook.
+    Dropdown refreshes and selection filtering become dictionary lookups.
+    A ``None`` name means "All" at that level: the dropdown lists skip blank
+    names, but "All" selections include the rows with a blank name.
+    """
+    def __init__(self, data: Optional[pd.DataFrame] = None):
+        self._tree: Dict[str, Dict[str, Dict[str, np.ndarray]]] = {}
+        self._rows_cache: Dict[Tuple, np.ndarray] = {}
+        if data is not None:
+            self.extend(data)
+
+    def extend(self, data: pd.DataFrame, offset: int = 0):
+        """Add a block of rows whose first row is at position ``offset``"""
+        self._rows_cache.clear()
+        
+        # Group on integer codes; missing names (code -1) become ''
+        codes = {}
+        names = {}
+        for col in TAXON_COLUMNS:
+            codes[col], uniques = _taxon_codes(data[col])
+            names[col] = list(uniques) + ['']
+        
+        groups = pd.DataFrame(codes).groupby(TAXON_COLUMNS, sort=False).indices
+        for (f, g, sp), rows in groups.items():
+            family, genus, species = names['family'][f], names['genus'][g], names['species'][sp]
+            species_map = self._tree.setdefault(family, {}).setdefault(genus, {})
+            rows = rows + offset
+            species_map[species] = np.concatenate([species_map[species], rows]) if species in species_map else rows
+
+    @staticmethod
+    def _matching(level: Dict, name: Optional[str]) -> List:
+        """Children of the entries matching ``name`` (all non-blank entries for None)"""
+        if name is None:
+            return [child for key, child in level.items() if not _is_blank_taxon(key)]
+        return [level[name]] if name in level else []
+
+    @staticmethod
+    def _selected(level: Dict, name: Optional[str]) -> List:
+        """Children of the entries selected by ``name`` (every entry, blank ones too, for None)"""
+        if name is None:
+            return list(level.values())
+        return [level[name]] if name in level else []
+
+    def families(self) -> List[str]:
+        return sorted(f for f in self._tree if not _is_blank_taxon(f))
+
+    def genera(self, family: Optional[str] = None) -> List[str]:
+        names = set()
+        for genera in self._matching(self._tree, family):
+            names.update(g for g in genera if not _is_blank_taxon(g))
+        return sorted(names)
+
+    def species(self, family: Optional[str] = None, genus: Optional[str] = None) -> List[str]:
+        names = set()
+        for genera in self._matching(self._tree, family):
+            for species in self._matching(genera, genus):
+                names.update(s for s in species if not _is_blank_taxon(s))
+        return sorted(names)
+
+    def taxa(self) -> List[Tuple[str, str, str]]:
+        """Every (family, genus, species) with no blank names, sorted"""
+        return sorted(
+            (family, genus, species)
+            for family, genera in self._tree.items() if not _is_blank_taxon(family)
+            for genus, species_map in genera.items() if not _is_blank_taxon(genus)
+            for species in species_map if not _is_blank_taxon(species)
+        )
+
+    def rows(self, family: Optional[str] = None, genus: Optional[str] = None,
+             species: Optional[str] = None) -> np.ndarray:
+        """Sorted row positions of the specimens matching the selection"""
+        key = (family, genus, species)
+        if key not in self._rows_cache:
+            parts = [
+                rows
+                for genera in self._selected(self._tree, family)
+                for species_map in self._selected(genera, genus)
+                for rows in self._selected(species_map, species)
+            ]
+            self._rows_cache[key] = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+        return self._rows_cache[key]
+
+# Specimen store
+REQUIRED_COLUMNS = ['lat', 'lat_dir', 'long', 'long_dir', 'family', 'genus', 'species', 'year']
+
+def format_bytes(size) -> str:
+    """Human readable size such as '12.3 MB'"""
+    for unit in ('bytes', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:,.0f} {unit}" if unit == 'bytes' else f"{size:,.1f} {unit}"
+        size /= 1024
+
+def normalized_taxon_categorical(values: pd.Series) -> pd.Categorical:
+    """
+    Stripped, lower case taxon names as a categorical.
+    The string clean-up runs once per distinct name rather than once per row.
+    """
+    codes, uniques = pd.factorize(values)
+    names = pd.Index(uniques, dtype=object).astype(str).str.strip().str.lower()
+    name_codes, categories = pd.factorize(names)
+    codes = np.where(codes >= 0, name_codes[np.maximum(codes, 0)], -1)
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+def compact_year(values: pd.Series) -> pd.Series:
+    """Collection years as a nullable 16-bit integer column"""
+    years = pd.to_numeric(values, errors='coerce').round()
+    years = years.where(years.abs() <= np.iinfo(np.int16).max)
+    return years.astype('Int16')
+
+class SpecimenStore:
+    """
+    Slim in-memory specimen table holding only what the mapper needs:
+    taxa as categoricals, parsed coordinates as float arrays (lon/lat plus the
+    Web Mercator and Montana State Plane projections, computed once at load
+    time), the coordinate status code and the year as a small integer.
+    Any ``extra_columns`` are passed through unchanged.
+    """
+    def __init__(self, frame: pd.DataFrame, source_bytes: Optional[int] = None,
+                 taxonomy: Optional[TaxonomyIndex] = None):
+        self.frame = frame
+        self.source_bytes = source_bytes  # Footprint of the full workbook DataFrame, if known
+        self._taxonomy = taxonomy
+        self.coordinates = ParsedCoordinates(
+            frame['lon'].to_numpy(),
+            frame['lat'].to_numpy(),
+            frame['coord_status'].to_numpy()
+        )
+        self._projected = {
+            crs: (np.ascontiguousarray(frame[x_col].to_numpy(dtype=float)),
+                  np.ascontiguousarray(frame[y_col].to_numpy(dtype=float)))
+            for crs, (x_col, y_col) in PROJECTED_COLUMNS.items()
+        }
+
+    @classmethod
+    def from_dataframe(cls, data: pd.DataFrame, coordinates: ParsedCoordinates, extra_columns=()):
+        frame = cls.normalised_frame(data, coordinates, extra_columns)
+        cls.add_projected_columns(frame)
+        return cls(frame, source_bytes=int(data.memory_usage(deep=True).sum()))
+
+    @staticmethod
+    def normalised_frame(data: pd.DataFrame, coordinates: ParsedCoordinates, extra_columns=()) -> pd.DataFrame:
+        """The compact table for a block of workbook rows, without the projected coordinates"""
+        frame = pd.DataFrame({
+            'family': normalized_taxon_categorical(data['family']),
+            'genus': normalized_taxon_categorical(data['genus']),
+            'species': normalized_taxon_categorical(data['species']),
+            'year': compact_year(data['year']).array,
+            'lon': coordinates.lon,
+            'lat': coordinates.lat,
+            'coord_status': coordinates.status,
+        })
+        for col in extra_columns:
+            frame[col] = data[col].array
+        return frame
+
+    @staticmethod
+    def add_projected_columns(frame: pd.DataFrame):
+        """Project every specimen once, at load time, so rendering only ever slices arrays"""
+        for crs, (x_col, y_col) in PROJECTED_COLUMNS.items():
+            frame[x_col], frame[y_col] = project_xy(frame['lon'].to_numpy(), frame['lat'].to_numpy(), crs)
+
+    @classmethod
+    def concat(cls, stores: List["SpecimenStore"], taxonomy: Optional[TaxonomyIndex] = None):
+        """Join stores end to end, merging the taxon categories"""
+        if len(stores) == 1:
+            frame = stores[0].frame
+        else:
+            frame = pd.concat([store.frame for store in stores], ignore_index=True)
+            for col in TAXON_COLUMNS:
+                frame[col] = pd.api.types.union_categoricals([store.frame[col] for store in stores], ignore_order=True)
+        source_bytes = sum(store.source_bytes or 0 for store in stores)
+        return cls(frame, source_bytes=source_bytes, taxonomy=taxonomy)
+
+    @property
+    def taxonomy(self) -> TaxonomyIndex:
+        """Taxonomy index over the store, built on first use"""
+        if self._taxonomy is None:
+            self._taxonomy = TaxonomyIndex(self.frame)
+        return self._taxonomy
+
+    def __len__(self):
+        return len(self.frame)
+
+    def xy(self, crs=WEB_MERCATOR_CRS) -> Tuple[np.ndarray, np.ndarray]:
+        """Projected x/y of every specimen (NaN for rejected rows); index with rows to select"""
+        return self._projected[crs]
+
+    def memory_bytes(self) -> int:
+        return int(self.frame.memory_usage(deep=True).sum())
+
+def read_specimen_workbook(file_path, coordinate_cache=None, extra_columns=(), progress=None) -> SpecimenStore:
+    """Parse a specimen workbook into a SpecimenStore, reading only the columns we need"""
+    progress = progress or (lambda message: None)
+    needed = set(REQUIRED_COLUMNS) | set(extra_columns)
+    
+    progress("Reading Excel file...")
+    with diagnostics.span('load', 'read') as span:
+        excel_data = pd.read_excel(file_path, usecols=lambda col: col in needed)
+        span.set(rows_out=len(excel_data))
+    if not all(col in excel_data.columns for col in REQUIRED_COLUMNS):
+        raise ValueError("Excel file must contain 'lat', 'lat_dir', 'long', 'long_dir', 'family', 'genus', 'species', and 'year' columns")
+    
+    # Parse every distinct locality once for the whole session
+    progress("Parsing coordinates...")
+    coordinate_cache = coordinate_cache if coordinate_cache is not None else CoordinateCache()
+    with diagnostics.span('load', 'coordinates', rows_in=len(excel_data)):
+        coordinates = coordinate_cache.parse(excel_data)
+    
+    # Keep only a compact copy of what the mapper needs
+    progress("Processing data...")
+    with diagnostics.span('load', 'normalise', rows_in=len(excel_data)) as span:
+        store = SpecimenStore.from_dataframe(excel_data, coordinates, extra_columns)
+        span.set(rows_out=len(store))
+    return store
+
+# Workbooks larger than this are streamed in chunks instead of read in one go
+STREAMING_THRESHOLD_BYTES = 20 * 1024 * 1024
+STREAM_CHUNK_ROWS = 50_000
+
+def iter_workbook_chunks(file_path, columns, chunk_size=STREAM_CHUNK_ROWS):
+    """
+    Yield the given columns of the first worksheet as DataFrames of at most
+    ``chunk_size`` rows, using openpyxl's read-only row iteration so the
+    whole sheet is never held in memory.
+    """
+    import openpyxl
+    
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, ())
+        # First occurrence of each wanted column, like read_excel
+        positions = {}
+        for i, name in enumerate(header):
+            if name in columns and name not in positions:
+                positions[name] = i
+        if not all(col in positions for col in columns):
+            raise ValueError("Excel file must contain 'lat', 'lat_dir', 'long', 'long_dir', 'family', 'genus', 'species', and 'year' columns")
+        
+        wanted = [positions[col] for col in columns]
+        chunk = []
+        for row in rows:
+            values = tuple(row[i] if i < len(row) else None for i in wanted)
+            # Skip blank rows (read-only mode also yields trailing empty rows)
+            if all(value is None for value in values):
+                continue
+            chunk.append(values)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame.from_records(chunk, columns=columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame.from_records(chunk, columns=columns)
+    finally:
+        workbook.close()
+
+def stream_specimen_workbook(file_path, coordinate_cache=None, extra_columns=(),
+                             chunk_size=STREAM_CHUNK_ROWS, progress=None, on_chunk=None) -> SpecimenStore:
+    """
+    Read a workbook in fixed-size chunks, parsing coordinates and growing the
+    taxonomy index as each chunk arrives. Memory for raw cells is bounded by
+    ``chunk_size``; only the compact store grows with the file.
+    ``on_chunk(chunk_store, rows_loaded)`` is called after every chunk, e.g.
+    to put the dots loaded so far on the map.
+    """
+    progress = progress or (lambda message: None)
+    coordinate_cache = coordinate_cache if coordinate_cache is not None else CoordinateCache()
+    columns = list(dict.fromkeys(REQUIRED_COLUMNS + list(extra_columns)))
+    
+    taxonomy = TaxonomyIndex()
+    stores = []
+    rows_loaded = 0
+    progress("Reading Excel file...")
+    chunks = iter_workbook_chunks(file_path, columns, chunk_size)
+    while True:
+        with diagnostics.span('load', 'read_chunk') as span:
+            chunk = next(chunks, None)
+            span.set(rows_out=0 if chunk is None else len(chunk))
+        if chunk is None:
+            break
+        with diagnostics.span('load', 'parse_chunk', rows_in=len(chunk)):
+            store = SpecimenStore.from_dataframe(chunk, coordinate_cache.parse(chunk), extra_columns)
+            del chunk
+            taxonomy.extend(store.frame, offset=rows_loaded)
+        stores.append(store)
+        rows_loaded += len(store)
+        progress(f"Loaded {rows_loaded:,} records...")
+        if on_chunk is not None:
+            on_chunk(store, rows_loaded)
+    
+    if not stores:
+        empty = pd.DataFrame({col: pd.Series(dtype=object) for col in columns})
+        stores.append(SpecimenStore.from_dataframe(empty, coordinate_cache.parse(empty), extra_columns))
+    
+    progress("Processing data...")
+    with diagnostics.span('load', 'concat', rows_in=rows_loaded):
+        return SpecimenStore.concat(stores, taxonomy=taxonomy)
+
+def load_specimen_workbook(file_path, coordinate_cache=None, extra_columns=(), progress=None,
+                           stream=None, on_chunk=None) -> SpecimenStore:
+    """
+    Load a specimen workbook through a sidecar Parquet cache of the parsed,
+    normalised specimen table. The cache entry is keyed by the workbook's path
+    and checked against its size, mtime and content hash, so reopening an
+    unchanged workbook skips Excel parsing entirely.
+    When the workbook has to be parsed, large files (or ``stream=True``) are
+    read in chunks with stream_specimen_workbook.
+    """
+    progress = progress or (lambda message: None)
+    extra_columns = list(extra_columns)
+    file_path = os.path.abspath(file_path)
+    key = hashlib.sha1(os.path.normcase(file_path).encode('utf-8')).hexdigest()[:16]
+    cache_dir = get_cache_dir('workbooks')
+    table_path = os.path.join(cache_dir, f"{key}.parquet")
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+    
+    if cache_meta_matches(meta_path, [file_path]):
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('extra_columns') == extra_columns:
+                progress("Reading cached specimen table...")
+                with diagnostics.span('load', 'cached_table') as span:
+                    store = SpecimenStore(pd.read_parquet(table_path), source_bytes=meta.get('source_bytes'))
+                    span.set(rows_out=len(store))
+                return store
+        except JobCancelled:
+            raise
+        except Exception as e:
+            print(f"Warning: Could not read workbook cache, re-reading the workbook: {str(e)}")
+    
+    if stream is None:
+        stream = os.path.getsize(file_path) > STREAMING_THRESHOLD_BYTES
+    if stream:
+        store = stream_specimen_workbook(file_path, coordinate_cache, extra_columns,
+                                         progress=progress, on_chunk=on_chunk)
+    else:
+        store = read_specimen_workbook(file_path, coordinate_cache, extra_columns, progress)
+    
+    try:
+        with diagnostics.span('load', 'write_cache', rows_in=len(store)):
+            store.frame.to_parquet(table_path, index=False)
+            write_cache_meta(meta_path, [file_path], path=file_path,
+                             extra_columns=extra_columns, source_bytes=store.source_bytes)
+    except Exception as e:
+        print(f"Warning: Could not write workbook cache: {str(e)}")
+    
+    return store
+
+# Background jobs
+class JobCancelled(Exception):
+    """Raised inside a background job once it has been cancelled or superseded"""
+
+class NothingToMapError(Exception):
+    """The request produced nothing to draw; the message is shown to the user as-is"""
+
+class BackgroundJob:
+    """
+    Handle passed to a job function running on a worker thread.
+    ``progress`` doubles as the cancellation checkpoint, so pipelines that
+    already report their stages stop at the next stage boundary.
+    """
+    def __init__(self, worker, key):
+        self.key = key
+        self._worker = worker
+        self._cancelled = threading.Event()
+        self.finished = False  # Set on the Tk thread once callbacks have run
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, message: str):
+        """Report a stage to the UI (and stop here if the job was cancelled)"""
+        self.check()
+        self._worker._post(self, 'progress', message)
+
+    def call_in_ui(self, callback, *args):
+        """Run ``callback(*args)`` on the Tk thread, unless the job is no longer current"""
+        self.check()
+        self._worker._post(self, 'call', (callback, args))
+
+class BackgroundWorker:
+    """
+    Runs long pipelines off the Tk thread so the mainloop never blocks.
+    Job functions must not touch widgets: progress, UI calls and results come
+    back through a thread-safe queue that is polled with ``root.after``.
+    Submitting a job with the key of one still running supersedes it.
+    """
+    POLL_MS = 50
+
+    def __init__(self, root, max_workers=2):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dot-mapper')
+        self._queue = queue.Queue()
+        self._active: Dict[str, BackgroundJob] = {}
+        self._callbacks: Dict[BackgroundJob, Dict] = {}
+        self._futures = set()  # Submitted and not finished, so shutdown can cancel the queued ones
+        self.root.after(self.POLL_MS, self._poll)
+
+    def submit(self, key, func, on_done=None, on_error=None, on_progress=None, on_finish=None) -> BackgroundJob:
+        """
+        Run ``func(job)`` on a worker thread. On the Tk thread, ``on_done(result)``
+        or ``on_error(exception)`` is called when it completes (``on_error`` also
+        gets any exception raised by ``on_done``), and ``on_finish()`` is always
+        called once, including on cancellation.
+        """
+        previous = self._active.get(key)
+        if previous is not None:
+            self.cancel(previous)
+        
+        job = BackgroundJob(self, key)
+        self._active[key] = job
+        self._callbacks[job] = {
+            'done': on_done, 'error': on_error, 'progress': on_progress, 'finish': on_finish
+        }
+
+        def run():
+            try:
+                job.check()
+                self._post(job, 'done', func(job))
+            except JobCancelled:
+                self._post(job, 'cancelled', None)
+            except Exception as e:
+                self._post(job, 'error', e)
+        
+        future = self._executor.submit(run)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        return job
+
+    def cancel(self, job: BackgroundJob):
+        """Cancel a job; its result (if it still produces one) is dropped"""
+        job.cancel()
+        self._finish(job)
+
+    def shutdown(self):
+        for job in list(self._active.values()):
+            self.cancel(job)
+        # shutdown(cancel_futures=True) needs Python 3.9
+        for future in list(self._futures):
+            future.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _post(self, job, kind, payload):
+        self._queue.put((job, kind, payload))
+
+    def _finish(self, job):
+        if job.finished:
+            return
+        job.finished = True
+        if self._active.get(job.key) is job:
+            del self._active[job.key]
+        callbacks = self._callbacks.get(job, {})
+        if callbacks.get('finish'):
+            callbacks['finish']()
+
+    def _dispatch(self, job, kind, payload):
+        # Anything from a cancelled or superseded job is dropped
+        if job.finished or job.cancelled:
+            self._finish(job)
+            self._callbacks.pop(job, None)
+            return
+        callbacks = self._callbacks[job]
+        if kind == 'progress':
+            if callbacks['progress']:
+                callbacks['progress'](payload)
+        elif kind == 'call':
+            callback, args = payload
+            callback(*args)
+        else:
+            # Finish first so loading windows are gone before any result dialog opens
+            self._finish(job)
+            self._callbacks.pop(job, None)
+            if kind == 'done' and callbacks['done']:
+                try:
+                    callbacks['done'](payload)
+                except Exception as e:
+                    # A result that cannot be shown is reported like a failed job
+                    if not callbacks['error']:
+                        raise
+                    callbacks['error'](e)
+            elif kind == 'error' and callbacks['error']:
+                callbacks['error'](payload)
+
+    def _poll(self):
+        try:
+            while True:
+                job, kind, payload = self._queue.get_nowait()
+                try:
+                    self._dispatch(job, kind, payload)
+                except Exception as e:
+                    print(f"Warning: Error handling background job result: {str(e)}")
+        except queue.Empty:
+            pass
+        finally:
+            # Scheduled after dispatching so a modal dialog opened by a callback
+            # cannot re-enter the poll loop
+            self.root.after(self.POLL_MS, self._poll)
+
 class SplashScreen:
     def __init__(self, parent):
         self.parent = parent
         self.splash = tk.Toplevel(parent)
         self.splash.title("Montana Dot Map Generator")
         
-        # Set icon
-        icon_path = get_icon_path()
-        if icon_path and os.path.exists(icon_path):
-            try:
-                self.splash.iconbitmap(icon_path)
-            except Exception as e:
-                print(f"Warning: Could not set icon for splash screen: {str(e)}")
-        
         # Get screen dimensions
         screen_width = self.splash.winfo_screenwidth()
         screen_height = self.splash.winfo_screenheight()
@@ -114,14 +1603,6 @@ class ToastNotification:
         toast = tk.Toplevel(self.parent)
         toast.overrideredirect(True)
         
-        # Set icon
-        icon_path = get_icon_path()
-        if icon_path and os.path.exists(icon_path):
-            try:
-                toast.iconbitmap(icon_path)
-            except Exception as e:
-                print(f"Warning: Could not set icon for toast: {str(e)}")
-        
         # Position toast at bottom right
         toast.geometry(f"+{self.parent.winfo_screenwidth() - 310}+{self.parent.winfo_screenheight() - 100}")
         
@@ -142,27 +1623,18 @@ class ToastNotification:
         toast.after(duration, toast.destroy)
 
 class LoadingIndicator:
-    def __init__(self, parent, message="Loading..."):
+    def __init__(self, parent, message="Loading...", on_cancel=None):
         self.parent = parent
         self.loading_window = tk.Toplevel(parent)
         self.loading_window.title("Loading")
         
-        # Set icon
-        icon_path = get_icon_path()
-        if icon_path:
-            try:
-                self.loading_window.iconbitmap(icon_path) if icon_path.endswith('.ico') else \
-                self.loading_window.iconphoto(True, tk.PhotoImage(file=icon_path))
-            except Exception as e:
-                print(f"Warning: Could not set icon for loading window: {str(e)}")
-        
         # Get screen dimensions
         screen_width = self.loading_window.winfo_screenwidth()
         screen_height = self.loading_window.winfo_screenheight()
         
         # Calculate position
         width = 300
-        height = 100
+        height = 140 if on_cancel else 100
         x = (screen_width - width) // 2
         y = (screen_height - height) // 2
         
@@ -190,36 +1662,31 @@ class LoadingIndicator:
         # Start the progress bar
         self.progress.start(10)
         
+        # Cancel button for background jobs
+        if on_cancel:
+            ttk.Button(self.loading_window, text="Cancel", command=on_cancel).pack(pady=(0, 10))
+        
         # Make sure the window is on top
         self.loading_window.lift()
         self.loading_window.attributes('-topmost', True)
         
         # Update the window
-        self.loading_window.update()
+        self.loading_window.update_idletasks()
 
     def update_message(self, message):
         self.status_label.config(text=message)
-        self.loading_window.update()
+        self.loading_window.update_idletasks()
     
     def destroy(self):
         self.progress.stop()
         self.loading_window.destroy()
 
 class SummaryDialog:
-    def __init__(self, parent, file_path, data):
+    def __init__(self, parent, file_path, specimens):
         self.parent = parent
         self.window = tk.Toplevel(parent)
         self.window.title("File Upload Success")
         
-        # Set icon
-        icon_path = get_icon_path()
-        if icon_path:
-            try:
-                self.window.iconbitmap(icon_path) if icon_path.endswith('.ico') else \
-                self.window.iconphoto(True, tk.PhotoImage(file=icon_path))
-            except Exception as e:
-                print(f"Warning: Could not set icon for summary dialog: {str(e)}")
-        
         # Get screen dimensions and calculate center position
         screen_width = self.window.winfo_screenwidth()
         screen_height = self.window.winfo_screenheight()
@@ -309,13 +1776,20 @@ class SummaryDialog:
         stats_frame = tk.Frame(file_frame, bg='#ffffff')
         stats_frame.pack(fill='x')
         
+        data = specimens.frame
+        memory = format_bytes(specimens.memory_bytes())
+        if specimens.source_bytes:
+            memory += f" (plain DataFrame {format_bytes(specimens.source_bytes)})"
+        
         stats = [
             ("File Name:", os.path.basename(file_path)),
             ("Total Records:", f"{len(data):,}"),
             ("Year Range:", f"{int(data['year'].min())} - {int(data['year'].max())}"),
             ("Unique Families:", f"{len(data['family'].unique()):,}"),
             ("Unique Genera:", f"{len(data['genus'].unique()):,}"),
-            ("Unique Species:", f"{len(data['species'].unique()):,}")
+            ("Unique Species:", f"{len(data['species'].unique()):,}"),
+            ("Usable Coordinates:", f"{int(specimens.coordinates.valid.sum()):,}"),
+            ("Memory Use:", memory)
         ]
         
         for i, (label, value) in enumerate(stats):
@@ -409,23 +1883,1592 @@ class SummaryDialog:
         
         self.window.wait_window()
     
-    def on_closing(self):
-        """Handle window closing and cleanup"""
-        # Unbind the mousewheel event
-        self.canvas.unbind_all("<MouseWheel>")
-        self.window.destroy()
+    def on_closing(self):
+        """Handle window closing and cleanup"""
+        # Unbind the mousewheel event
+        self.canvas.unbind_all("<MouseWheel>")
+        self.window.destroy()
+
+class DiagnosticsWindow:
+    """
+    Non-modal window listing the most recent diagnostics spans, newest first,
+    with a switch to turn recording on and off.
+    """
+    POLL_MS = 500
+    COLUMNS = (
+        ('time', "Time", 80),
+        ('operation', "Operation", 80),
+        ('stage', "Stage", 130),
+        ('seconds', "Seconds", 70),
+        ('rows_in', "Rows In", 80),
+        ('rows_out', "Rows Out", 80),
+        ('peak', "Peak Memory", 90),
+    )
+
+    def __init__(self, parent, diagnostics):
+        self.diagnostics = diagnostics
+        self.window = tk.Toplevel(parent)
+        self.window.title("Diagnostics")
+        self.window.geometry("720x420")
+        self.window.transient(parent)
+        self._version = None
+        
+        top = ttk.Frame(self.window, padding=(10, 10, 10, 0))
+        top.pack(fill='x')
+        self.recording = tk.BooleanVar(value=diagnostics.enabled)
+        ttk.Checkbutton(top, text="Record Timings", variable=self.recording,
+                        command=self.toggle_recording).pack(side='left')
+        self.trace_memory = tk.BooleanVar(value=diagnostics.trace_memory)
+        ttk.Checkbutton(top, text="Trace Peak Memory (slows loading)", variable=self.trace_memory,
+                        command=lambda: diagnostics.set_trace_memory(self.trace_memory.get())).pack(side='left', padx=(10, 0))
+        ttk.Button(top, text="Clear", command=diagnostics.clear).pack(side='right')
+        
+        self.log_label = ttk.Label(self.window, padding=(10, 5))
+        self.log_label.pack(fill='x')
+        
+        table_frame = ttk.Frame(self.window, padding=(10, 0, 10, 10))
+        table_frame.pack(fill='both', expand=True)
+        self.table = ttk.Treeview(table_frame, columns=[name for name, _, _ in self.COLUMNS], show='headings')
+        for name, heading, width in self.COLUMNS:
+            self.table.heading(name, text=heading)
+            self.table.column(name, width=width, anchor='w' if name in ('time', 'operation', 'stage') else 'e')
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.table.yview)
+        self.table.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        self.table.pack(side='left', fill='both', expand=True)
+        
+        self._update_log_label()
+        self._poll()
+
+    def toggle_recording(self):
+        if self.recording.get():
+            self.diagnostics.enable()
+        else:
+            self.diagnostics.disable()
+        self._update_log_label()
+
+    def _update_log_label(self):
+        if self.diagnostics.enabled:
+            self.log_label.configure(text=f"Logging to {self.diagnostics.log_path}")
+        else:
+            self.log_label.configure(text="Recording is off")
+
+    @staticmethod
+    def _row(record):
+        def count(name):
+            value = record.get(name)
+            return f"{value:,}" if value is not None else ""
+        
+        peak = record.get('peak_bytes')
+        stage = "    " * record.get('depth', 0) + record['stage']
+        if 'error' in record:
+            stage += f" ({record['error']})"
+        return (
+            record['time'][11:],
+            record['operation'],
+            stage,
+            f"{record['seconds']:.3f}",
+            count('rows_in'),
+            count('rows_out'),
+            (format_bytes(peak) + (" (shared)" if record.get('peak_shared') else "")) if peak is not None else "",
+        )
+
+    def _poll(self):
+        """Refresh the table when new spans were recorded (they may come from worker threads)"""
+        if not self.window.winfo_exists():
+            return
+        if self.diagnostics.version != self._version:
+            self._version, records = self.diagnostics.snapshot()
+            self.table.delete(*self.table.get_children())
+            for record in reversed(records):
+                self.table.insert('', 'end', values=self._row(record))
+        self.window.after(self.POLL_MS, self._poll)
+
+    def show(self):
+        self.window.deiconify()
+        self.window.lift()
+
+# Selected points
+SELECTION_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+def select_dots(specimens, boundary, family=None, genus=None, species=None, species_info=None) -> Dict:
+    """
+    Points to map for a taxon selection (``None`` means All at that level),
+    as the ``dots`` dict draw_dot_map expects: Web Mercator ``x`` and ``y``
+    arrays, the specimen ``rows`` they came from, the ``count`` and the
+    rows skipped for their coordinates per reason in ``rejected``.
+    Raises NothingToMapError when nothing is left to draw.
+    """
+    # Rows matching the species selection, straight from the taxonomy index
+    rows = specimens.taxonomy.rows(family, genus, species)
+    if len(rows) == 0:
+        raise NothingToMapError("No data found for selected species")
+    
+    # Look up the coordinates parsed when the workbook was loaded
+    coords = specimens.coordinates.take(rows)
+    rejected = coords.rejection_counts()
+    
+    # Keep points within Montana (rejected rows have NaN coordinates and drop out here)
+    inside = boundary.contains_xy(coords.lon, coords.lat, WGS84_CRS)
+    if not inside.any():
+        raise NothingToMapError("No points found within Montana's boundaries")
+    
+    # Slice the Web Mercator coordinates projected when the workbook was loaded
+    rows = rows[inside]
+    x, y = specimens.xy(WEB_MERCATOR_CRS)
+    return {
+        'x': x[rows],
+        'y': y[rows],
+        'rows': rows,
+        'species_info': species_info,
+        'count': len(rows),
+        'rejected': rejected
+    }
+
+class SelectionCache:
+    """
+    LRU of the selected points (as select_dots returns them) for recently
+    viewed taxon selections, kept within a memory budget. Entries belong to
+    one specimen store, so a new cache is started for every loaded workbook.
+    """
+    def __init__(self, max_bytes=SELECTION_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _size(dots) -> int:
+        return sum(value.nbytes for value in dots.values() if isinstance(value, np.ndarray))
+
+    def get(self, key) -> Optional[Dict]:
+        with self._lock:
+            dots = self._entries.get(key)
+            if dots is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dots
+
+    def put(self, key, dots):
+        size = self._size(dots)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._size(self._entries.pop(key))
+            self._entries[key] = dots
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._size(evicted)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+        }
+
+# Collection sites
+SITE_MARKER_SIZE = 25  # Marker area (points²) of a single-specimen site, same as a plain dot
+SITE_TOLERANCE_MAX = 10000  # Metres; the cells compared grow with it, and beyond this sites span whole counties
+SITE_PAIR_CHUNK = 1 << 20  # Candidate point pairs compared at a time when merging nearby sites
+
+def _site_roots(parent, points) -> np.ndarray:
+    """The root of each of ``points`` in the ``parent`` forest"""
+    roots = parent[points]
+    while True:
+        above = parent[roots]
+        if np.array_equal(above, roots):
+            return roots
+        roots = above
+
+def _join_sites(parent, i, j):
+    """Join the trees of each pair of points ``i[k]``, ``j[k]`` (the lower root becomes the parent)"""
+    while len(i):
+        root_i, root_j = _site_roots(parent, i), _site_roots(parent, j)
+        apart = root_i != root_j
+        i, j, root_i, root_j = i[apart], j[apart], root_i[apart], root_j[apart]
+        np.minimum.at(parent, np.maximum(root_i, root_j), np.minimum(root_i, root_j))
+
+def merge_nearby_points(x, y, tolerance, chunk=SITE_PAIR_CHUNK) -> np.ndarray:
+    """
+    Site labels for points (x, y in metres) where any two points within
+    ``tolerance`` of each other share a label, as do chains of such points.
+    Points are binned into cells of the tolerance size, so only pairs in the
+    same or neighbouring cells are compared, ``chunk`` pairs at a time, and
+    close pairs are joined in a union-find forest.
+    """
+    cell_x = np.floor(x / tolerance).astype(np.int64)
+    cell_y = np.floor(y / tolerance).astype(np.int64)
+    cell_x -= cell_x.min() - 1
+    cell_y -= cell_y.min() - 1
+    width = int(cell_y.max()) + 2
+    cell = cell_x * width + cell_y  # Leaves room for the neighbours on every side
+    order = np.argsort(cell, kind='stable')
+    x, y = x[order], y[order]
+    cells, starts, sizes = np.unique(cell[order], return_index=True, return_counts=True)
+    
+    # Pairs of points in each cell and its neighbours to the right and above
+    parent = np.arange(len(x))
+    for dx, dy in ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1)):
+        target = cells + dx * width + dy
+        position = np.minimum(np.searchsorted(cells, target), len(cells) - 1)
+        a = np.flatnonzero(cells[position] == target)
+        b = position[a]
+        start_a, start_b, size_b = starts[a], starts[b], sizes[b]
+        pairs = sizes[a] * size_b
+        ends = np.cumsum(pairs)
+        total = int(ends[-1]) if len(ends) else 0
+        for first in range(0, total, chunk):
+            pair = np.arange(first, min(first + chunk, total))
+            owner = np.searchsorted(ends, pair, side='right')
+            within = pair - (ends[owner] - pairs[owner])
+            i = start_a[owner] + within // size_b[owner]
+            j = start_b[owner] + within % size_b[owner]
+            keep = (x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2 <= tolerance ** 2
+            if dx == 0 and dy == 0:
+                keep &= i < j
+            _join_sites(parent, i[keep], j[keep])
+            parent = _site_roots(parent, np.arange(len(x)))
+    
+    labels = np.empty_like(parent)
+    labels[order] = parent
+    return labels
+
+def aggregate_sites(dots, specimens, tolerance=0.0) -> Dict:
+    """
+    Collapse the points of ``dots`` into one marker per collection site.
+    Points are grouped by exact coordinates or, with a ``tolerance`` in metres,
+    merged with every point within that distance of them in Montana State
+    Plane coordinates (merge_nearby_points). Sites are placed at the mean of
+    their points, largest first, with their specimen counts in
+    ``site_counts``; ``count`` stays the number of specimens.
+    """
+    plane_x, plane_y = specimens.xy(MONTANA_CRS)
+    keys_x, keys_y = plane_x[dots['rows']], plane_y[dots['rows']]
+    locations, site = np.unique(keys_x + 1j * keys_y, return_inverse=True)
+    site = site.ravel()
+    if tolerance > 0 and len(locations):
+        _, site = np.unique(merge_nearby_points(locations.real, locations.imag, tolerance)[site],
+                            return_inverse=True)
+        site = site.ravel()
+    counts = np.bincount(site)
+    x = np.bincount(site, weights=dots['x']) / counts
+    y = np.bincount(site, weights=dots['y']) / counts
+    
+    # Draw the largest sites first so smaller ones stay visible on top
+    order = np.argsort(-counts, kind='stable')
+    return dict(dots, x=x[order], y=y[order], site_counts=counts[order], sites=len(counts))
+
+def site_marker_sizes(counts) -> np.ndarray:
+    """Marker areas for site counts (grows with the square root so busy sites don't swamp the map)"""
+    return SITE_MARKER_SIZE * np.sqrt(counts)
+
+def site_legend_counts(max_count) -> List[int]:
+    """Example counts for the site size legend: powers of ten well below the largest site, then the largest"""
+    counts = [count for count in (1, 10, 100, 1000) if count * 3 <= max_count]
+    return counts + [int(max_count)]
+
+# Density rendering
+DENSITY_GRID_WIDTH = 400  # Cells across the map extent
+DENSITY_SMOOTHING = 2.0  # Gaussian kernel sigma, in cells
+
+def gaussian_kernel(sigma) -> np.ndarray:
+    """Normalised 2D Gaussian kernel reaching out to three sigma"""
+    offsets = np.arange(-math.ceil(3 * sigma), math.ceil(3 * sigma) + 1)
+    weights = np.exp(-0.5 * (offsets / sigma) ** 2)
+    weights /= weights.sum()
+    return np.outer(weights, weights)
+
+def smooth_density(grid, sigma=DENSITY_SMOOTHING) -> np.ndarray:
+    """
+    Convolve a density grid with a Gaussian kernel through the FFT. The grid
+    is zero padded by the kernel radius so nothing wraps around the edges.
+    """
+    kernel = gaussian_kernel(sigma)
+    radius = kernel.shape[0] // 2
+    shape = (grid.shape[0] + 2 * radius, grid.shape[1] + 2 * radius)
+    smoothed = np.fft.irfft2(np.fft.rfft2(grid, shape) * np.fft.rfft2(kernel, shape), shape)
+    smoothed = smoothed[radius:radius + grid.shape[0], radius:radius + grid.shape[1]]
+    return np.maximum(smoothed, 0.0)  # FFT round-off can dip just below zero
+
+def density_layer(dots, extent, boundary, smoothing=DENSITY_SMOOTHING, width=DENSITY_GRID_WIDTH) -> Dict:
+    """
+    Bin the points of ``dots`` into a grid over the map ``extent`` (Web Mercator
+    xmin, ymin, xmax, ymax), optionally smoothed, with cells outside Montana
+    blanked. The grid goes into ``dots['density']`` as (grid, image extent,
+    floor), where ``floor`` is the lowest value a lone specimen produces, so
+    drawing it costs the same however many specimens there are.
+    """
+    xmin, ymin, xmax, ymax = extent
+    height = max(1, round(width * (ymax - ymin) / (xmax - xmin)))
+    grid, _, _ = np.histogram2d(dots['y'], dots['x'], bins=(height, width), range=((ymin, ymax), (xmin, xmax)))
+    floor = 0.5
+    if smoothing > 0:
+        grid = smooth_density(grid, smoothing)
+        floor = gaussian_kernel(smoothing).max() / 2
+    
+    # Blank cells whose centre falls outside Montana (the image is also clipped to the outline when drawn)
+    cell_x = xmin + (np.arange(width) + 0.5) * (xmax - xmin) / width
+    cell_y = ymin + (np.arange(height) + 0.5) * (ymax - ymin) / height
+    cell_x, cell_y = np.meshgrid(cell_x, cell_y)
+    inside = boundary.contains_xy(cell_x.ravel(), cell_y.ravel(), WEB_MERCATOR_CRS).reshape(grid.shape)
+    grid[~inside] = 0.0
+    return dict(dots, density=(grid, (xmin, xmax, ymin, ymax), floor))
+
+# Simple color scheme
+MAP_COLORS = {
+    'county_border': '#000000',      # Black county borders
+    'county_fill': '#f8f9fa',        # Light gray fill for counties
+    'text': '#000000'                # Black text
+}
+
+def draw_base_map(figure, base_layer, show_county_lines=True, background=None, relief=None):
+    """
+    Draw the static layers of a dot map (optional background image and terrain
+    relief, counties or outline, north arrow and scale bar) into a cleared
+    ``figure`` and return the map axes. ``background`` and ``relief`` are
+    (image, extent) pairs such as TileCache.mosaic and HillshadeCache.relief return.
+    """
+    colors = MAP_COLORS
+    
+    # Clear the figure
+    figure.clf()
+    
+    # Create single subplot
+    ax = figure.add_subplot(111)
+    
+    # Configure axis
+    ax.set_frame_on(False)
+    ax.set_xticks([])
+    ax.set_yticks([])
+    ax.set_aspect('equal')
+    
+    # Get bounds for the map (the county layer is already in Web Mercator)
+    bounds = base_layer.bounds
+    extent = map_extent(bounds)  # Small padding
+    
+    # Set the plot bounds
+    ax.set_xlim([extent[0], extent[2]])
+    ax.set_ylim([extent[1], extent[3]])
+    
+    # Topographic background under everything else (counties are left unfilled
+    # whenever a background or relief is drawn)
+    if background is not None:
+        image, image_extent = background
+        ax.imshow(image, extent=image_extent, interpolation='bilinear', zorder=1)
+        ax.set_xlim([extent[0], extent[2]])
+        ax.set_ylim([extent[1], extent[3]])
+        figure.text(0.95, 0.01, TILE_ATTRIBUTION, ha='right', va='bottom',
+                    fontsize=6, color='#555555')
+    
+    # Hillshade on top of the background (or the plain white figure)
+    if relief is not None:
+        image, image_extent = relief
+        ax.imshow(image, extent=image_extent, interpolation='bilinear', zorder=2)
+        ax.set_xlim([extent[0], extent[2]])
+        ax.set_ylim([extent[1], extent[3]])
+    
+    # Plot county boundaries with simple styling (only if checkbox is checked),
+    # otherwise show Montana's outer boundary, as a single collection
+    if show_county_lines:
+        base = base_layer.collection(
+            True,
+            facecolors='none' if background is not None or relief is not None else colors['county_fill'],  # Light gray fill
+            edgecolors=colors['county_border'],   # Black borders
+            linewidths=0.8,
+            zorder=5
+        )
+    else:
+        base = base_layer.collection(
+            False,
+            facecolors='none' if background is not None or relief is not None else 'white',  # White fill
+            edgecolors=colors['county_border'],   # Black outer border
+            linewidths=1.5,                       # Slightly thicker border
+            zorder=5
+        )
+    ax.add_collection(base, autolim=False)
+    
+    # Add north arrow
+    ax.annotate('N', xy=(0.05, 0.95), xycoords='axes fraction',
+               fontsize=14, fontweight='bold',
+               color=colors['text'],
+               ha='center', va='center')
+    
+    # Add scale bar (accurately calculated for 100 km)
+    # Calculate the actual distance in meters for 100 km at Montana's latitude
+    # Montana is roughly at 47°N latitude
+    lat_rad = math.radians(47)  # Montana's approximate latitude
+    # Web Mercator projection scale factor at this latitude
+    scale_factor = 1 / math.cos(lat_rad)
+    
+    # Calculate 100 km in Web Mercator units
+    # 1 degree longitude ≈ 111,320 meters at equator
+    # At 47°N, 1 degree longitude ≈ 111,320 * cos(47°) meters
+    meters_per_degree = 111320 * math.cos(lat_rad)
+    km_100_in_degrees = 100000 / meters_per_degree
+    
+    # Convert to Web Mercator projection units
+    scale_length_meters = km_100_in_degrees * 111320 * scale_factor
+    
+    # Position scale bar in bottom-left corner
+    scale_x = bounds[0] + (bounds[2] - bounds[0]) * 0.05  # 5% from left edge
+    scale_y = bounds[1] + (bounds[3] - bounds[1]) * 0.05  # 5% from bottom edge
+    
+    # Draw the scale bar
+    ax.plot([scale_x, scale_x + scale_length_meters], [scale_y, scale_y],
+           color=colors['text'], linewidth=2)
+    ax.text(scale_x + scale_length_meters/2, scale_y - (bounds[3] - bounds[1]) * 0.02,
+           '100 km', ha='center', va='top',
+           fontsize=8, color=colors['text'])
+    
+    # Adjust layout
+    figure.subplots_adjust(left=0.05, right=0.95,
+                         bottom=0.05, top=0.92)
+    
+    return ax
+
+def draw_dot_layer(figure, ax, dots, dot_color='#ff0000', clip_path=None) -> List:
+    """
+    Draw the parts of a dot map that change with the selection (dots, title
+    and legend) onto a base map and return the new artists. A density grid
+    (see density_layer) is drawn as one image clipped to ``clip_path``.
+    """
+    colors = dict(MAP_COLORS, dots=dot_color)  # User-selected dot color
+    artists = []
+    site_counts = dots.get('site_counts')
+    density = dots.get('density')
+    
+    # Plot dots with simple styling (coordinates are already in Web Mercator)
+    if density is not None:
+        # Cells below what a lone specimen produces stay transparent
+        grid, image_extent, floor = density
+        from matplotlib.colors import to_rgb, LinearSegmentedColormap, PowerNorm
+        rgb = to_rgb(colors['dots'])
+        cmap = LinearSegmentedColormap.from_list('density', [(*rgb, 0.25), (*rgb, 1.0)])
+        cmap.set_bad(alpha=0.0)
+        cmap.set_under(alpha=0.0)
+        xlim, ylim = ax.get_xlim(), ax.get_ylim()
+        image = ax.imshow(np.ma.masked_less(grid, floor), extent=image_extent, origin='lower',
+                          cmap=cmap, norm=PowerNorm(0.5, vmin=floor, vmax=max(grid.max(), floor)),
+                          interpolation='bilinear', zorder=15)
+        if clip_path is not None:
+            image.set_clip_path(clip_path, ax.transData)
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+        artists.append(image)
+    elif site_counts is None:
+        artists.append(ax.scatter(dots['x'], dots['y'],
+                  c=colors['dots'],     # Red dots
+                  s=SITE_MARKER_SIZE,   # Appropriate size
+                  alpha=1.0,           # Full opacity
+                  edgecolors='none',   # No border
+                  linewidth=0,         # No line
+                  zorder=15))          # Ensure dots are on top
+    else:
+        # One marker per site, sized by its specimen count and outlined so overlaps stay readable
+        artists.append(ax.scatter(dots['x'], dots['y'],
+                  c=colors['dots'],
+                  s=site_marker_sizes(site_counts),
+                  alpha=0.85,
+                  edgecolors='white',
+                  linewidth=0.5,
+                  zorder=15))
+    
+    # Add title
+    species_info = dots['species_info']
+    title = dots.get('title')
+    if title is None and species_info:
+        family, genus, species = species_info.split(' > ')
+        title = f"Known geographic distribution of {genus} {species} in Montana"
+    if title:
+        artists.append(figure.text(0.5, 0.98, title,
+                      ha='center', va='top',
+                      fontsize=12, fontweight='normal',
+                      color=colors['text'],
+                      style='italic'))
+    
+    # Add legend
+    import matplotlib.patches as mpatches
+    from matplotlib.lines import Line2D
+    columns = 1
+    if density is not None:
+        legend_title = None
+        legend_elements = [
+            mpatches.Patch(facecolor=colors['dots'],
+                          edgecolor='none',
+                          label=f'Specimen Density ({dots["count"]} total)')
+        ]
+    elif site_counts is None:
+        legend_title = None
+        legend_elements = [
+            mpatches.Patch(facecolor=colors['dots'],
+                          edgecolor='none',
+                          label=f'Specimen Location ({dots["count"]} total)')
+        ]
+    else:
+        legend_title = f"{dots['sites']:,} sites, {dots['count']:,} specimens"
+        legend_elements = [
+            Line2D([], [], linestyle='none', marker='o',
+                   markersize=math.sqrt(site_marker_sizes(count)),  # Diameter for a marker area
+                   markerfacecolor=colors['dots'],
+                   markeredgecolor='white',
+                   alpha=0.85,
+                   label=f"{count:,} specimen{'s' if count != 1 else ''}")
+            for count in site_legend_counts(site_counts.max())
+        ]
+        columns = len(legend_elements)  # One row, so the larger markers stay clear of the map
+    
+    artists.append(ax.legend(handles=legend_elements,
+                     loc='lower right',
+                     frameon=False,
+                     fontsize=10,
+                     ncol=columns,
+                     title=legend_title,
+                     title_fontsize=10))
+    
+    return artists
+
+def draw_dot_map(figure, dots, base_layer, dot_color='#ff0000', show_county_lines=True,
+                 background=None, relief=None):
+    """
+    Draw a dot map with Montana counties and specimen locations into ``figure``.
+    Works on any Figure (the on-screen canvas or an off-screen export figure)
+    and returns the map axes.
+    """
+    ax = draw_base_map(figure, base_layer, show_county_lines, background, relief)
+    draw_dot_layer(figure, ax, dots, dot_color, clip_path=base_layer.outline_paths[0])
+    return ax
+
+class BlitManager:
+    """
+    Redraws only a canvas' animated artists over a cached raster of everything
+    else. The background is recaptured on every full draw and a full draw is
+    forced when the canvas size changes.
+    """
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.artists = []
+        self._background = None
+        self._background_size = None
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def set_artists(self, artists):
+        """Replace the animated artists (the old ones are removed from the figure)"""
+        for artist in self.artists:
+            artist.remove()
+        self.artists = list(artists)
+        for artist in self.artists:
+            artist.set_animated(True)
+
+    def invalidate(self):
+        """Force a full draw on the next update (the static layers changed)"""
+        self._background = None
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._background_size = self.canvas.get_width_height()
+        self._draw_animated()
+
+    def _draw_animated(self):
+        for artist in self.artists:
+            self.canvas.figure.draw_artist(artist)
+
+    def update(self):
+        if self._background is None or self._background_size != self.canvas.get_width_height():
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_animated()
+            self.canvas.blit(self.canvas.figure.bbox)
+
+# Map export
+EXPORT_FIGSIZE = (10, 8)  # Inches, same as the on-screen map
+EXPORT_DPI = 300
+EXPORT_FORMATS = ('tiff', 'png', 'pdf', 'svg')
+RASTER_FORMATS = ('tiff', 'png')  # Formats the DotRasterizer can write
+TIFF_COMPRESSIONS = {'lzw': 'tiff_lzw', 'deflate': 'tiff_adobe_deflate'}
+
+# Download Dot Map choices: label -> (format, TIFF compression, tiled)
+EXPORT_PRESETS = {
+    "TIFF (LZW)": ('tiff', 'lzw', False),
+    "TIFF (Deflate)": ('tiff', 'deflate', False),
+    "TIFF (Deflate, tiled)": ('tiff', 'deflate', True),
+    "PNG": ('png', None, False),
+    "PDF": ('pdf', None, False),
+    "SVG": ('svg', None, False),
+}
+TILED_TIFF_FALLBACK = "tiled TIFFs need the tifffile package, so a striped TIFF was written"
+
+@lru_cache(maxsize=None)
+def has_tifffile() -> bool:
+    """Whether the optional tifffile package (for tiled TIFFs) is installed"""
+    return importlib.util.find_spec('tifffile') is not None
+
+def save_map(figure, path, fmt='tiff', dpi=EXPORT_DPI, compression='lzw', tiled=False) -> int:
+    """
+    Write an off-screen figure at exactly its size and ``dpi`` and return the
+    file size. TIFFs are rendered once with Agg and written by save_image;
+    PNG, PDF and SVG go through savefig.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    if fmt != 'tiff':
+        figure.savefig(path, format=fmt, dpi=dpi)
+        return os.path.getsize(path)
+    
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    canvas = FigureCanvasAgg(figure)
+    figure.set_dpi(dpi)
+    canvas.draw()
+    return save_image(np.asarray(canvas.buffer_rgba()), path, fmt, dpi, compression, tiled)
+
+def save_image(rgba, path, fmt='tiff', dpi=EXPORT_DPI, compression='lzw', tiled=False) -> int:
+    """
+    Write an opaque RGBA image array as an RGB TIFF or PNG and return the
+    file size. TIFFs are compressed by Pillow; tiled TIFFs need the optional
+    tifffile package and are always Deflate-compressed (without tifffile a
+    striped TIFF is written, see has_tifffile).
+    """
+    if fmt not in RASTER_FORMATS:
+        raise ValueError(f"Unsupported image format: {fmt}")
+    from PIL import Image
+    image = Image.fromarray(rgba).convert('RGB')
+    if fmt == 'png':
+        image.save(path, format='PNG', dpi=(dpi, dpi))
+        return os.path.getsize(path)
+    
+    if tiled and has_tifffile():
+        import tifffile
+        tifffile.imwrite(path, np.asarray(image), photometric='rgb', tile=(256, 256), compression='zlib',
+                         resolution=(dpi, dpi), resolutionunit='INCH')
+        return os.path.getsize(path)
+    image.save(path, format='TIFF', compression=TIFF_COMPRESSIONS[compression or 'lzw'], dpi=(dpi, dpi))
+    return os.path.getsize(path)
+
+# Fast raster export
+DOT_SPRITE_SUBPIXELS = 4  # Sprite variants per pixel along each axis
+DOT_SPRITE_SUPERSAMPLE = 8  # Coverage samples per pixel along each axis
+DOT_STAMP_MAX_POSITIONS = 1_000  # Beyond this many distinct dots Agg's own marker stamping is faster
+
+def dot_sprites(diameter) -> np.ndarray:
+    """
+    Anti-aliased coverage masks of a filled circle ``diameter`` pixels wide,
+    one per sub-pixel offset: ``sprites[oy, ox]`` is centred at
+    (radius + ox / DOT_SPRITE_SUBPIXELS, radius + oy / DOT_SPRITE_SUBPIXELS)
+    pixels from the sprite's top-left corner, with radius = ceil(diameter / 2).
+    """
+    radius = diameter / 2
+    size = 2 * math.ceil(radius) + 2
+    samples = (np.arange(size * DOT_SPRITE_SUPERSAMPLE) + 0.5) / DOT_SPRITE_SUPERSAMPLE
+    offsets = math.ceil(radius) + np.arange(DOT_SPRITE_SUBPIXELS) / DOT_SPRITE_SUBPIXELS
+    # Squared distance of every sample from the centre, per offset and axis
+    d2 = (samples[None, :] - offsets[:, None]) ** 2
+    inside = (d2[:, None, :, None] + d2[None, :, None, :]) <= radius ** 2
+    inside = inside.reshape(DOT_SPRITE_SUBPIXELS, DOT_SPRITE_SUBPIXELS,
+                            size, DOT_SPRITE_SUPERSAMPLE, size, DOT_SPRITE_SUPERSAMPLE)
+    return inside.mean(axis=(3, 5))
+
+class DotRasterizer:
+    """
+    Fast render path for maps written as TIFF or PNG. The base map
+    (background, relief, counties, north arrow and scale bar) is drawn once
+    with matplotlib and kept as a raster. Each map restores it, stamps
+    anti-aliased dot sprites at the projected pixel positions with NumPy and
+    then draws only the title and legend on top. Site and density maps (and
+    selections with very many distinct positions) have their dot layer drawn
+    by matplotlib over the same cached base instead.
+    """
+    def __init__(self, base_layer, show_county_lines=True, background=None, relief=None,
+                 figsize=EXPORT_FIGSIZE, dpi=EXPORT_DPI):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.colors import to_rgb
+        from matplotlib.figure import Figure
+        self._to_rgb = to_rgb
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = draw_base_map(self.figure, base_layer, show_county_lines, background, relief)
+        self.canvas.draw()
+        self._base = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._clip_path = base_layer.outline_paths[0]
+        self._lock = threading.Lock()
+        
+        # Sprites as flat lists of (row, column, log transmittance) per sub-pixel
+        # offset, keeping only the pixels each circle actually covers
+        sprites = dot_sprites(math.sqrt(SITE_MARKER_SIZE) * dpi / 72)  # Marker size is in points
+        size = sprites.shape[-1]
+        self._radius = (size - 2) // 2
+        sprites = sprites.reshape(-1, size * size)
+        order = np.argsort(sprites == 0, axis=1, kind='stable')[:, :int((sprites > 0).sum(axis=1).max())]
+        self._sprite_rows = (order // size).astype(np.int64)
+        self._sprite_cols = (order % size).astype(np.int64)
+        self._sprite_log = np.log(np.maximum(1.0 - np.take_along_axis(sprites, order, axis=1), 1e-6))
+
+    def _stamp(self, image, x, y, color) -> bool:
+        """Stamp plain dots into ``image``; False (leaving it untouched) when there are too many"""
+        height, width = image.shape[:2]
+        pixels = self.ax.transData.transform(np.column_stack([x, y]))
+        
+        # Dots are clipped to the axes like the scatter they replace, so only those
+        # whose sprite reaches the axes matter
+        x0, y0, x1, y1 = np.round(self.ax.bbox.extents).astype(int)
+        reach = self._radius + 2
+        pixels = pixels[(pixels[:, 0] > x0 - reach) & (pixels[:, 0] < x1 + reach) &
+                        (pixels[:, 1] > y0 - reach) & (pixels[:, 1] < y1 + reach)]
+        
+        # Dots at the same sub-pixel position are stamped once, weighted by how many
+        # there are (image rows run top to bottom, display y bottom to top)
+        offset = (reach + height) * DOT_SPRITE_SUBPIXELS  # Keeps the position keys positive
+        stride = (width + 2 * reach + 2 * height) * DOT_SPRITE_SUBPIXELS
+        sub_x = np.round(pixels[:, 0] * DOT_SPRITE_SUBPIXELS).astype(np.int64) + offset
+        sub_y = np.round((height - pixels[:, 1]) * DOT_SPRITE_SUBPIXELS).astype(np.int64) + offset
+        positions, counts = np.unique(sub_y * stride + sub_x, return_counts=True)
+        if len(positions) > DOT_STAMP_MAX_POSITIONS:
+            return False
+        sub_y = positions // stride - offset
+        sub_x = positions % stride - offset
+        
+        variant = (sub_y % DOT_SPRITE_SUBPIXELS) * DOT_SPRITE_SUBPIXELS + sub_x % DOT_SPRITE_SUBPIXELS
+        rows = (sub_y // DOT_SPRITE_SUBPIXELS - self._radius)[:, None] + self._sprite_rows[variant]
+        cols = (sub_x // DOT_SPRITE_SUBPIXELS - self._radius)[:, None] + self._sprite_cols[variant]
+        weights = self._sprite_log[variant] * counts[:, None]
+        
+        keep = (rows >= height - y1) & (rows < height - y0) & (cols >= x0) & (cols < x1)
+        
+        # Overlapping dots multiply their transmittance, i.e. add its log
+        touched, inverse = np.unique(rows[keep] * width + cols[keep], return_inverse=True)
+        alpha = (1.0 - np.exp(np.bincount(inverse, weights=weights[keep], minlength=len(touched))))[:, None]
+        rgb = image.reshape(-1, 4)[:, :3]
+        rgb[touched] = np.round(rgb[touched] * (1.0 - alpha) + np.asarray(color) * 255 * alpha).astype(np.uint8)
+        return True
+
+    def render(self, dots, dot_color='#ff0000') -> np.ndarray:
+        """The finished map as an RGBA array (a copy, safe to keep)"""
+        with self._lock:
+            self.canvas.restore_region(self._base)
+            image = np.asarray(self.canvas.buffer_rgba())
+            plain = 'site_counts' not in dots and 'density' not in dots
+            if plain and self._stamp(image, dots['x'], dots['y'], self._to_rgb(dot_color)):
+                # Title and legend from the usual dot layer, with the dots themselves left out
+                dots = dict(dots, x=np.empty(0), y=np.empty(0))
+            
+            for artist in draw_dot_layer(self.figure, self.ax, dots, dot_color, clip_path=self._clip_path):
+                self.figure.draw_artist(artist)
+                artist.remove()
+            return image.copy()
+
+# Render cache
+RENDER_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+class RenderCache:
+    """
+    Content-addressed disk cache of exported map files. Entries are keyed by a
+    hash of everything that goes into the output (the filtered points, title,
+    styling, what the background layers were made from, size, DPI and file
+    format), so an identical
+    request is served by copying the cached file. Entries are evicted least
+    recently used first once the cache grows past ``max_bytes``.
+    """
+    def __init__(self, cache_dir=None, max_bytes=RENDER_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir or get_cache_dir('renders')
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _update(cls, digest, value):
+        if isinstance(value, np.ndarray):
+            digest.update(f"{value.dtype}{value.shape}".encode('utf-8'))
+            digest.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, (list, tuple)):
+            digest.update(f"[{len(value)}".encode('utf-8'))
+            for item in value:
+                cls._update(digest, item)
+        elif isinstance(value, dict):
+            for name in sorted(value):
+                digest.update(f"{name}=".encode('utf-8'))
+                cls._update(digest, value[name])
+        else:
+            digest.update(repr(value).encode('utf-8'))
+        digest.update(b';')
+
+    def key(self, dots, **options) -> str:
+        """Hash of a map's points, title and count plus any rendering ``options``"""
+        digest = hashlib.sha256()
+        self._update(digest, [
+            CACHE_FORMAT_VERSION,
+            dots['x'],
+            dots['y'],
+            dots.get('species_info'),
+            dots.get('title'),
+            dots.get('site_counts'),
+            dots.get('density'),
+            dots['count'],
+            options
+        ])
+        return digest.hexdigest()
+
+    def _path(self, key, file_path):
+        return os.path.join(self.cache_dir, key + os.path.splitext(file_path)[1])
+
+    def fetch(self, key, file_path) -> bool:
+        """Copy the cached render for ``key`` to ``file_path``; False on a miss"""
+        cached = self._path(key, file_path)
+        try:
+            shutil.copyfile(cached, file_path)
+            os.utime(cached)  # Mark as recently used
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, key, file_path):
+        """Add a freshly rendered file to the cache and evict old entries past the size cap"""
+        cached = self._path(key, file_path)
+        try:
+            temp_path = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.copyfile(file_path, temp_path)
+            os.replace(temp_path, cached)
+            self._evict()
+        except OSError as e:
+            print(f"Warning: Could not write render cache: {str(e)}")
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self) -> Dict:
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+        }
+
+# Batch rendering
+BATCH_STAGES = ('select', 'draw', 'save')
+
+# County layer, boundary and specimens loaded once per batch worker process
+_batch_context: Dict = {}
+
+def taxon_filename(family, genus, species, fmt) -> str:
+    """File name for a taxon's map, e.g. 'Megachilidae_Megachile_relativa.tiff'"""
+    name = f"{family.title()}_{genus.title()}_{species}"
+    return re.sub(r'[^\w.-]+', '_', name) + f".{fmt}"
+
+def _init_batch_worker(workbook_path, options):
+    """Process pool initializer: load the county layer and specimen table once per worker"""
+    counties, outline = load_montana_counties()
+    boundary = MontanaBoundary(outline)
+    _batch_context.update(
+        tile_cache=TileCache() if options['topo_background'] else None,
+        hillshade=HillshadeCache(options['dem_path']) if options['dem_path'] else None,
+        render_cache=RenderCache() if options['use_render_cache'] else None,
+        base_layer=CountyBaseLayer(counties, boundary),
+        boundary=boundary,
+        specimens=load_specimen_workbook(workbook_path),
+        options=options
+    )
+
+def _render_taxa(taxa) -> List[Dict]:
+    """Render a chunk of taxa in a batch worker, reusing one off-screen figure"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    options = _batch_context['options']
+    figure = Figure(figsize=options['figsize'])
+    FigureCanvasAgg(figure)
+    
+    extent = map_extent(_batch_context['base_layer'].bounds)
+    size = (int(options['figsize'][0] * options['dpi']), int(options['figsize'][1] * options['dpi']))
+    background = relief = background_source = relief_source = None
+    if _batch_context['tile_cache'] is not None:
+        background = _batch_context['tile_cache'].mosaic(extent, size)
+        background_source = _batch_context['tile_cache'].source(extent, size)
+    if _batch_context['hillshade'] is not None:
+        relief = _batch_context['hillshade'].relief(extent, size)
+        relief_source = _batch_context['hillshade'].source(extent, size)
+    render_cache = _batch_context['render_cache']
+    render_options = {
+        name: options[name]
+        for name in ('format', 'compression', 'tiled', 'dpi', 'figsize', 'dot_color', 'show_county_lines')
+    }
+    
+    # TIFF and PNG maps are drawn onto a raster of the base map, built once per worker
+    rasterizer = _batch_context.get('rasterizer')
+    if rasterizer is None and options['format'] in RASTER_FORMATS:
+        rasterizer = DotRasterizer(_batch_context['base_layer'], options['show_county_lines'],
+                                   background, relief, options['figsize'], options['dpi'])
+        _batch_context['rasterizer'] = rasterizer
+    
+    results = []
+    for family, genus, species in taxa:
+        result = {'taxon': (family, genus, species), 'path': None, 'error': None, 'empty': False,
+                  'cached': False, 'rejected': {}, 'timings': {}}
+        start = time.perf_counter()
+        try:
+            dots = select_dots(
+                _batch_context['specimens'],
+                _batch_context['boundary'],
+                family, genus, species,
+                species_info=f"{family.title()} > {genus.title()} > {species}"
+            )
+            result['rejected'] = dots['rejected']
+            if options['density_smoothing'] is not None:
+                dots = density_layer(dots, extent, _batch_context['boundary'], options['density_smoothing'])
+            elif options['site_tolerance'] is not None:
+                dots = aggregate_sites(dots, _batch_context['specimens'], options['site_tolerance'])
+            result['timings']['select'] = time.perf_counter() - start
+            
+            # Identical maps (same points, title, styling and output settings) are copied from the cache
+            start = time.perf_counter()
+            path = os.path.join(options['out_dir'], taxon_filename(family, genus, species, options['format']))
+            if render_cache is not None:
+                key = render_cache.key(dots, background=background_source, relief=relief_source,
+                                       bounds=_batch_context['base_layer'].bounds, **render_options)
+                if render_cache.fetch(key, path):
+                    result['timings']['save'] = time.perf_counter() - start
+                    result['path'] = path
+                    result['cached'] = True
+                    results.append(result)
+                    continue
+            
+            start = time.perf_counter()
+            if rasterizer is not None:
+                image = rasterizer.render(dots, options['dot_color'])
+            else:
+                draw_dot_map(figure, dots, _batch_context['base_layer'],
+                             dot_color=options['dot_color'], show_county_lines=options['show_county_lines'],
+                             background=background, relief=relief)
+            result['timings']['draw'] = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            if rasterizer is not None:
+                save_image(image, path, options['format'], options['dpi'], options['compression'], options['tiled'])
+            else:
+                save_map(figure, path, options['format'], options['dpi'], options['compression'], options['tiled'])
+            if render_cache is not None:
+                render_cache.store(key, path)
+            result['timings']['save'] = time.perf_counter() - start
+            result['path'] = path
+        except NothingToMapError:
+            # E.g. a taxon only collected outside Montana: nothing to draw, but nothing went wrong
+            result['empty'] = True
+        except Exception as e:
+            result['error'] = str(e)
+        results.append(result)
+    return results
+
+def run_batch(workbook_path, out_dir, fmt='tiff', dpi=EXPORT_DPI, workers=None, chunk_size=4,
+              dot_color='#ff0000', show_county_lines=True, topo_background=False,
+              dem_path=None, compression='lzw', tiled=False, use_render_cache=True,
+              site_tolerance=None, density_smoothing=None, progress=print) -> Dict:
+    """
+    Render a dot map for every species in a workbook without the GUI.
+    Chunks of taxa are fanned out over a process pool; each worker loads the
+    county layer and specimen table once (from the caches warmed here) and
+    writes one file per taxon. With a ``site_tolerance`` (metres, 0 for exact
+    coordinates) specimens are drawn as one marker per collection site; with a
+    ``density_smoothing`` (grid cells, 0 for none) as a density raster instead.
+    Returns a throughput summary.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    started = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    
+    # Load once in this process so the workers only read the cached tables
+    load_montana_counties()
+    specimens = load_specimen_workbook(workbook_path, progress=progress)
+    taxa = specimens.taxonomy.taxa()
+    load_seconds = time.perf_counter() - started
+    
+    chunks = [taxa[i:i + chunk_size] for i in range(0, len(taxa), chunk_size)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(chunks)))
+    options = {
+        'out_dir': out_dir,
+        'format': fmt,
+        'compression': compression,
+        'tiled': tiled,
+        'dpi': dpi,
+        'figsize': EXPORT_FIGSIZE,
+        'dot_color': dot_color,
+        'show_county_lines': show_county_lines,
+        'topo_background': topo_background,
+        'dem_path': os.path.abspath(dem_path) if dem_path else None,
+        'use_render_cache': use_render_cache,
+        'site_tolerance': site_tolerance,
+        'density_smoothing': density_smoothing,
+    }
+    
+    stage_seconds = dict.fromkeys(BATCH_STAGES, 0.0)
+    maps = 0
+    cached = 0
+    skipped = Counter()
+    empty = 0
+    failed = []
+    if chunks:
+        progress(f"Rendering {len(taxa):,} maps on {workers} worker processes...")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                 initargs=(os.path.abspath(workbook_path), options)) as pool:
+            for future in as_completed([pool.submit(_render_taxa, chunk) for chunk in chunks]):
+                for result in future.result():
+                    for stage, seconds in result['timings'].items():
+                        stage_seconds[stage] += seconds
+                    skipped.update(result['rejected'])
+                    if result['path']:
+                        maps += 1
+                        cached += result['cached']
+                    elif result['empty']:
+                        empty += 1
+                    else:
+                        failed.append(result)
+                        print(f"Warning: No map for {' '.join(result['taxon'])}: {result['error']}")
+                progress(f"Rendered {maps:,} of {len(taxa):,} maps...")
+    
+    elapsed = time.perf_counter() - started
+    return {
+        'workbook': workbook_path,
+        'out_dir': out_dir,
+        'taxa': len(taxa),
+        'maps': maps,
+        'cached': cached,
+        'failed': len(failed),
+        'skipped': dict(skipped),
+        'empty': empty,
+        'workers': workers,
+        'load_seconds': load_seconds,
+        'elapsed_seconds': elapsed,
+        'maps_per_second': maps / elapsed if elapsed else 0.0,
+        'stage_seconds': stage_seconds,
+    }
+
+def format_batch_summary(summary: Dict) -> str:
+    lines = [
+        f"Maps written: {summary['maps']:,} of {summary['taxa']:,} taxa to {summary['out_dir']}"
+        + (f" ({summary['failed']:,} failed)" if summary['failed'] else ""),
+        f"Total time: {summary['elapsed_seconds']:.1f} s on {summary['workers']} workers "
+        f"({summary['maps_per_second']:.2f} maps/sec)",
+        f"  load: {summary['load_seconds']:.2f} s",
+    ]
+    if summary['cached']:
+        lines.insert(1, f"Served from the render cache: {summary['cached']:,} of {summary['maps']:,} maps")
+    if summary['empty']:
+        lines.insert(1, f"Skipped taxa with no points in Montana: {summary['empty']:,}")
+    if summary['skipped']:
+        lines.insert(1, f"Skipped records: {sum(summary['skipped'].values()):,} "
+                        f"({format_rejection_counts(summary['skipped'])})")
+    for stage, seconds in summary['stage_seconds'].items():
+        per_map = seconds / summary['maps'] if summary['maps'] else 0.0
+        lines.append(f"  {stage}: {seconds:.2f} s across workers ({per_map * 1000:.0f} ms/map)")
+    return "\n".join(lines)
+
+def batch_main(argv=None) -> int:
+    """Command line entry point: ``python montana_dot_mapper.py batch WORKBOOK``"""
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="montana_dot_mapper.py batch",
+        description="Render a dot map for every species in a specimen workbook"
+    )
+    parser.add_argument('workbook', help="Excel workbook with specimen data")
+    parser.add_argument('-o', '--out', default='dot_maps', help="output folder (default: dot_maps)")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='tiff')
+    parser.add_argument('--compression', choices=sorted(TIFF_COMPRESSIONS), default='lzw', help="TIFF compression")
+    parser.add_argument('--tiled', action='store_true', help="write tiled TIFFs (needs tifffile)")
+    parser.add_argument('--dpi', type=int, default=EXPORT_DPI)
+    parser.add_argument('--no-render-cache', action='store_true', help="always re-render, even unchanged maps")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=4, help="taxa per task (default: 4)")
+    parser.add_argument('--dot-color', default='#ff0000')
+    parser.add_argument('--no-county-lines', action='store_true', help="draw only Montana's outline")
+    parser.add_argument('--group-sites', type=float, nargs='?', const=0.0, default=None, metavar='METRES',
+                        help="one marker per collection site sized by specimen count, "
+                             "merging sites within METRES of each other (default: exact coordinates only)")
+    parser.add_argument('--density', type=float, nargs='?', const=DENSITY_SMOOTHING, default=None, metavar='CELLS',
+                        help="draw a density raster instead of dots, smoothed over CELLS grid cells "
+                             f"(default: {DENSITY_SMOOTHING:g}, 0 for none)")
+    parser.add_argument('--topo', action='store_true', help="draw the topographic background (see seed-tiles)")
+    parser.add_argument('--dem', default=None, help="elevation GeoTIFF to draw as hillshaded terrain relief")
+    args = parser.parse_args(argv)
+    if args.group_sites is not None and not 0 <= args.group_sites <= SITE_TOLERANCE_MAX:
+        parser.error(f"--group-sites must be from 0 to {SITE_TOLERANCE_MAX:,} metres")
+    if args.tiled and not has_tifffile():
+        print("Warning: Tiled TIFFs need the tifffile package, writing striped TIFFs instead")
+        args.tiled = False
+    
+    try:
+        summary = run_batch(
+            args.workbook,
+            args.out,
+            fmt=args.format,
+            dpi=args.dpi,
+            workers=args.workers,
+            chunk_size=max(1, args.chunk_size),
+            dot_color=args.dot_color,
+            show_county_lines=not args.no_county_lines,
+            topo_background=args.topo,
+            dem_path=args.dem,
+            compression=args.compression,
+            tiled=args.tiled,
+            use_render_cache=not args.no_render_cache,
+            site_tolerance=args.group_sites,
+            density_smoothing=args.density
+        )
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    print(format_batch_summary(summary))
+    return 0 if summary['failed'] == 0 else 2
+
+def parse_zoom_range(text) -> List[int]:
+    """Zoom levels from '8' or '5-10'"""
+    first, _, last = text.partition('-')
+    first, last = int(first), int(last or first)
+    if not 0 <= first <= last <= TILE_MAX_ZOOM:
+        raise ValueError(f"Zoom levels must be between 0 and {TILE_MAX_ZOOM}: {text}")
+    return list(range(first, last + 1))
+
+def seed_tiles_main(argv=None) -> int:
+    """Command line entry point: ``python montana_dot_mapper.py seed-tiles``"""
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="montana_dot_mapper.py seed-tiles",
+        description="Download the topographic background tiles covering Montana for offline use"
+    )
+    parser.add_argument('--zoom', default='5-10', help="zoom level or range (default: 5-10)")
+    parser.add_argument('--url', default=None,
+                        help="tile URL template with {z}/{x}/{y} (default: OpenTopoMap or MONTANA_DOT_MAPPER_TILE_URL)")
+    parser.add_argument('--workers', type=int, default=4, help="parallel downloads (default: 4)")
+    args = parser.parse_args(argv)
+    
+    try:
+        zooms = parse_zoom_range(args.zoom)
+        counties, outline = load_montana_counties()
+        extent = map_extent(CountyBaseLayer(counties, MontanaBoundary(outline)).bounds)
+        tile_cache = TileCache(args.url)
+        print(f"Seeding zoom {args.zoom} from {tile_cache.url} into {tile_cache.cache_dir}")
+        started = time.perf_counter()
+        counts = tile_cache.seed(extent, zooms, workers=args.workers, progress=print)
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    print(f"Tiles: {counts['tiles']:,} ({counts['cached']:,} already cached, {counts['downloaded']:,} downloaded, "
+          f"{counts['failed']:,} failed) in {time.perf_counter() - started:.1f} s")
+    return 0 if counts['failed'] == 0 else 2
+
+# Benchmarks
+EXCEL_MAX_ROWS = 1_048_575  # Data rows that fit on one worksheet under the header
+BENCHMARK_STAGES = ('read', 'coordinates', 'normalise', 'projection', 'taxonomy',
+                    'boundary', 'select', 'render', 'export')
+BENCHMARK_SIZES = (1_000, 10_000, 100_000)
+BENCHMARK_TOLERANCE = 0.2  # Slowdown against the baseline reported as a regression
+BENCHMARK_MIN_SECONDS = 0.005  # Differences smaller than this are timer noise
+
+# Montana's bounding box (slightly larger than the state, so some sites fall outside it)
+SYNTHETIC_LAT_RANGE = (44.3, 49.05)
+SYNTHETIC_LONG_RANGE = (104.0, 116.1)
+SYNTHETIC_SYLLABLES = ['an', 'bo', 'ce', 'di', 'er', 'fu', 'ga', 'hi', 'la', 'me', 'no', 'pa',
+                       'ri', 'so', 'ta', 'ul', 've', 'xa', 'zo', 'cy']
+
+def _synthetic_names(rng, count, suffix) -> List[str]:
+    """Distinct latin-looking names"""
+    names = set()
+    while len(names) < count:
+        syllables = rng.choice(SYNTHETIC_SYLLABLES, size=rng.integers(2, 5))
+        names.add(''.join(syllables) + suffix)
+    return sorted(names)
+
+def _zipf_choice(rng, count, size, exponent=1.1) -> np.ndarray:
+    """Indexes in range(count) where low ranks are much more common, like specimen collections"""
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return rng.choice(count, size=size, p=weights / weights.sum())
+
+def _format_coordinates(values, styles) -> List:
+    """Coordinates as workbooks hold them: numbers, decimal strings and DMS strings"""
+    formatted = []
+    for value, style in zip(values.tolist(), styles.tolist()):
+        degrees = int(value)
+        minutes = (value - degrees) * 60
+        if style == 0:
+            formatted.append(round(value, 5))
+        elif style == 1:
+            formatted.append(f"{degrees}°{minutes:.3f}'")
+        elif style == 2:
+            seconds = (minutes - int(minutes)) * 60
+            formatted.append(f"{degrees}°{int(minutes)}'{seconds:.0f}\"")
+        else:
+            formatted.append(f"{value:.4f}")
+    return formatted
+
+def synthetic_specimens(rows, seed=0) -> pd.DataFrame:
+    """
+    A fake specimen table shaped like real collection data: a skewed taxonomy
+    (a few species make up most records), specimens clustered on shared
+    collecting sites, coordinates mixed between numbers, decimal strings and
+    DMS strings, inconsistent direction columns, and a sprinkling of missing,
+    unreadable and out-of-range coordinates.
+    """
+    rng = np.random.default_rng(seed)
+    
+    # Taxonomy: families -> genera -> species, picked with a Zipf-like skew
+    taxa = []
+    for family in _synthetic_names(rng, 12, 'idae'):
+        for genus in _synthetic_names(rng, int(rng.integers(2, 8)), 'us'):
+            for species in _synthetic_names(rng, int(rng.integers(1, 10)), 'a'):
+                taxa.append((family.title(), genus.title(), species))
+    taxon = _zipf_choice(rng, len(taxa), rows)
+    families, genera, species = (np.array(names, dtype=object) for names in zip(*taxa))
+    
+    # Collecting sites, each written down the same way every time it is used
+    sites = max(10, rows // 10)
+    site_lat = rng.uniform(*SYNTHETIC_LAT_RANGE, size=sites)
+    site_long = rng.uniform(*SYNTHETIC_LONG_RANGE, size=sites)
+    site_styles = rng.choice(4, size=sites, p=[0.5, 0.25, 0.15, 0.1])
+    site_lat = np.array(_format_coordinates(site_lat, site_styles), dtype=object)
+    site_long = np.array(_format_coordinates(site_long, site_styles), dtype=object)
+    site = _zipf_choice(rng, sites, rows, exponent=0.8)
+    lat = site_lat[site]
+    long = site_long[site]
+    
+    # Broken rows: missing, unreadable and out-of-range coordinates
+    broken = rng.random(rows)
+    lat[broken < 0.01] = None
+    lat[(broken >= 0.01) & (broken < 0.015)] = "unknown"
+    long[(broken >= 0.015) & (broken < 0.02)] = 0.0
+    
+    lat_dir = rng.choice(np.array(['N', 'n', None], dtype=object), size=rows, p=[0.9, 0.05, 0.05])
+    long_dir = rng.choice(np.array(['W', 'w', None], dtype=object), size=rows, p=[0.85, 0.05, 0.1])
+    year = rng.integers(1890, 2025, size=rows).astype(float)
+    year[rng.random(rows) < 0.02] = np.nan
+    
+    return pd.DataFrame({
+        'catalog_number': [f"MTSYN{i:08d}" for i in range(rows)],
+        'family': families[taxon],
+        'genus': genera[taxon],
+        'species': species[taxon],
+        'lat': lat,
+        'lat_dir': lat_dir,
+        'long': long,
+        'long_dir': long_dir,
+        'year': year,
+        'collector': rng.choice(np.array(_synthetic_names(rng, 40, ''), dtype=object), size=rows),
+    })
+
+def synthetic_workbook(rows, seed=0) -> str:
+    """Path of a synthetic specimen workbook, written once and kept in the cache folder"""
+    if rows > EXCEL_MAX_ROWS:
+        raise ValueError(f"An Excel worksheet holds at most {EXCEL_MAX_ROWS:,} rows")
+    path = os.path.join(get_cache_dir('benchmarks'), f"synthetic_{rows}_{seed}.xlsx")
+    if not os.path.exists(path):
+        temp_path = f"{path}.{os.getpid()}.tmp.xlsx"
+        synthetic_specimens(rows, seed).to_excel(temp_path, index=False, engine='openpyxl')
+        os.replace(temp_path, path)
+    return path
+
+def _benchmark_pipeline(data_or_path, boundary, base_layer, rasterizer, out_dir) -> Dict[str, float]:
+    """Time one pass of the load and map pipeline, stage by stage"""
+    timings = {}
+
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[stage] = time.perf_counter() - start
+        return result
+    
+    # Load: what load_excel does for a workbook that is not cached yet
+    data = data_or_path
+    if isinstance(data_or_path, str):
+        data = timed('read', lambda: pd.read_excel(data_or_path, usecols=lambda col: col in REQUIRED_COLUMNS))
+    coordinates = timed('coordinates', CoordinateCache().parse, data)
+    frame = timed('normalise', SpecimenStore.normalised_frame, data, coordinates)
+    timed('projection', SpecimenStore.add_projected_columns, frame)
+    store = SpecimenStore(frame)
+    taxonomy = timed('taxonomy', lambda: store.taxonomy)
+    timed('boundary', boundary.contains_xy, store.coordinates.lon, store.coordinates.lat, WGS84_CRS)
+    
+    # Generate: the most collected species, drawn on screen and downloaded as a TIFF
+    family, genus, species = max(taxonomy.taxa(), key=lambda taxon: len(taxonomy.rows(*taxon)))
+    dots = timed('select', select_dots, store, boundary, family, genus, species,
+                 f"{family.title()} > {genus.title()} > {species}")
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    figure = Figure(figsize=EXPORT_FIGSIZE)
+    canvas = FigureCanvasAgg(figure)
+    timed('render', lambda: (draw_dot_map(figure, dots, base_layer), canvas.draw()))
+    timed('export', lambda: save_image(rasterizer.render(dots), os.path.join(out_dir, 'benchmark.tiff')))
+    return timings
+
+def run_benchmark(sizes=BENCHMARK_SIZES, repeat=1, seed=0, progress=print) -> Dict:
+    """
+    Time every pipeline stage on synthetic workbooks of the given sizes, keeping
+    the best of ``repeat`` runs. Sizes too large for one worksheet skip the
+    Excel read and start from the generated table.
+    """
+    import datetime
+    import tempfile
+    
+    counties, outline = load_montana_counties()
+    boundary = MontanaBoundary(outline)
+    base_layer = CountyBaseLayer(counties, boundary)
+    rasterizer = DotRasterizer(base_layer)  # Built once, like the app's cached export base map
+    
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for rows in sizes:
+            progress(f"Preparing {rows:,} synthetic specimens...")
+            data_or_path = synthetic_workbook(rows, seed) if rows <= EXCEL_MAX_ROWS else synthetic_specimens(rows, seed)
+            best = {}
+            for run in range(repeat):
+                progress(f"Timing {rows:,} rows (run {run + 1} of {repeat})...")
+                for stage, seconds in _benchmark_pipeline(data_or_path, boundary, base_layer, rasterizer, out_dir).items():
+                    best[stage] = min(best.get(stage, seconds), seconds)
+            results.append({'rows': rows, 'stages': {stage: best[stage] for stage in BENCHMARK_STAGES if stage in best}})
+    
+    return {
+        'format': 1,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'seed': seed,
+        'repeat': repeat,
+        'environment': environment_info(),
+        'results': results,
+    }
+
+def environment_info() -> Dict:
+    """Python, platform and library versions, recorded with benchmark and startup reports"""
+    import platform
+    import matplotlib
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'frozen': bool(getattr(sys, 'frozen', False)),
+        'packages': {
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'geopandas': gpd.__version__,
+            'shapely': shapely.__version__,
+            'matplotlib': matplotlib.__version__,
+        },
+    }
+
+def format_benchmark(report: Dict) -> str:
+    lines = []
+    for result in report['results']:
+        stages = result['stages']
+        lines.append(f"{result['rows']:,} rows: {sum(stages.values()):.2f} s")
+        for stage, seconds in stages.items():
+            lines.append(f"  {stage}: {seconds * 1000:.1f} ms")
+    return "\n".join(lines)
+
+def compare_benchmarks(report: Dict, baseline: Dict, tolerance=BENCHMARK_TOLERANCE) -> Tuple[List[str], int]:
+    """Stage by stage comparison with a baseline report; returns the lines and the number of regressions"""
+    baseline_results = {result['rows']: result['stages'] for result in baseline.get('results', [])}
+    lines = []
+    regressions = 0
+    for result in report['results']:
+        before = baseline_results.get(result['rows'])
+        if before is None:
+            lines.append(f"{result['rows']:,} rows: not in the baseline")
+            continue
+        lines.append(f"{result['rows']:,} rows:")
+        for stage, seconds in result['stages'].items():
+            if stage not in before:
+                continue
+            ratio = seconds / before[stage] if before[stage] else float('inf')
+            slower = ratio > 1 + tolerance and seconds - before[stage] > BENCHMARK_MIN_SECONDS
+            regressions += slower
+            lines.append(f"  {stage}: {before[stage] * 1000:.1f} -> {seconds * 1000:.1f} ms "
+                         f"({ratio:.2f}x){'  REGRESSION' if slower else ''}")
+    return lines, regressions
+
+def parse_row_counts(text) -> List[int]:
+    """Row counts from '1k,100k,1M' style lists"""
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    counts = []
+    for part in text.split(','):
+        part = part.strip().lower()
+        multiplier = multipliers.get(part[-1:], 1)
+        counts.append(int(float(part.rstrip('km')) * multiplier))
+    return counts
+
+def benchmark_main(argv=None) -> int:
+    """Command line entry point: ``python montana_dot_mapper.py benchmark``"""
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="montana_dot_mapper.py benchmark",
+        description="Time each stage of loading and mapping synthetic specimen workbooks"
+    )
+    parser.add_argument('--rows', default='1k,10k,100k',
+                        help="workbook sizes, e.g. 1k,100k,1M,10M (default: 1k,10k,100k)")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per size, the fastest is kept (default: 1)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for the synthetic data (default: 0)")
+    parser.add_argument('-o', '--out', default='benchmark.json', help="results file (default: benchmark.json)")
+    parser.add_argument('--baseline', default=None, help="earlier results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=BENCHMARK_TOLERANCE,
+                        help=f"slowdown reported as a regression (default: {BENCHMARK_TOLERANCE:g} = 20%%)")
+    args = parser.parse_args(argv)
+    
+    try:
+        sizes = parse_row_counts(args.rows)
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        report = run_benchmark(sizes, repeat=max(1, args.repeat), seed=args.seed)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    print(format_benchmark(report))
+    print(f"Results written to {args.out}")
+    
+    if baseline is None:
+        return 0
+    lines, regressions = compare_benchmarks(report, baseline, args.tolerance)
+    print(f"Compared with {args.baseline}:")
+    print("\n".join(lines))
+    return 0 if regressions == 0 else 2
+
+# Startup report
+STARTUP_REPORT_ENV = 'MONTANA_DOT_MAPPER_STARTUP_REPORT'  # The app writes its startup times here, then exits
+# launch: interpreter (or PyInstaller bootloader) start, imports: this module imported,
+# window: main window shown, interactive: event loop running, libraries: background
+# imports done, map: map canvas drawn
+STARTUP_PHASES = ('launch', 'imports', 'window', 'interactive', 'libraries', 'map')
+
+def app_command() -> List[str]:
+    """Command line that starts the application, from source or from the PyInstaller build"""
+    if getattr(sys, 'frozen', False):
+        return [sys.executable]
+    return [sys.executable, os.path.abspath(__file__)]
+
+def run_startup_report(runs=3, timeout=120, progress=print) -> Dict:
+    """
+    Start the application ``runs`` times and time each startup phase from the
+    moment the process was launched; the median of each phase is reported.
+    """
+    import datetime
+    import statistics
+    import subprocess
+    import tempfile
+    
+    command = app_command()
+    samples = {phase: [] for phase in STARTUP_PHASES}
+    with tempfile.TemporaryDirectory() as report_dir:
+        for run in range(runs):
+            progress(f"Starting the application (run {run + 1} of {runs})...")
+            report_path = os.path.join(report_dir, f"startup_{run}.json")
+            env = dict(os.environ, **{STARTUP_REPORT_ENV: report_path})
+            launched = time.time()
+            subprocess.run(command, env=env, timeout=timeout, check=True)
+            with open(report_path, encoding='utf-8') as f:
+                report = json.load(f)
+            samples['launch'].append(report['module_started'] - launched)
+            for phase, at in report['phases'].items():
+                samples[phase].append(at - launched)
+    
+    return {
+        'format': 1,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'command': command,
+        'runs': runs,
+        'environment': environment_info(),
+        'phases': {phase: statistics.median(times) for phase, times in samples.items() if times},
+    }
+
+def format_startup_report(report: Dict, baseline: Optional[Dict] = None) -> str:
+    """Seconds from launch to each phase, next to a baseline report's if given"""
+    def label(r):
+        return "PyInstaller build" if r['environment'].get('frozen') else "Source"
+    
+    lines = [f"{'Phase':<12}{label(report):>20}" + (f"{label(baseline):>20}" if baseline else "")]
+    for phase in STARTUP_PHASES:
+        if phase not in report['phases']:
+            continue
+        line = f"{phase:<12}{report['phases'][phase]:>18.2f} s"
+        if baseline and phase in baseline['phases']:
+            line += f"{baseline['phases'][phase]:>18.2f} s"
+        lines.append(line)
+    return "\n".join(lines)
+
+def startup_main(argv=None) -> int:
+    """Command line entry point: ``python montana_dot_mapper.py startup``"""
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="montana_dot_mapper.py startup",
+        description="Time how long the application takes to start, phase by phase"
+    )
+    parser.add_argument('--runs', type=int, default=3, help="starts to time, the median is reported (default: 3)")
+    parser.add_argument('-o', '--out', default='startup.json', help="results file (default: startup.json)")
+    parser.add_argument('--compare', default=None, metavar='FILE',
+                        help="earlier results to show alongside, e.g. from the PyInstaller build")
+    args = parser.parse_args(argv)
+    
+    try:
+        baseline = None
+        if args.compare:
+            with open(args.compare, encoding='utf-8') as f:
+                baseline = json.load(f)
+        report = run_startup_report(max(1, args.runs))
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    print(format_startup_report(report, baseline))
+    print(f"Results written to {args.out}")
+    return 0
 
 class MainApplication:
+    # Quiet period after the last resize event before the map is redrawn
+    RESIZE_SETTLE_MS = 150
+
     def __init__(self):
+        self._startup = {'imports': time.time()}  # Startup phase -> time reached
         self.root = tk.Tk()
         self.root.withdraw()  # Hide main window initially
         
-        # Set icon
+        # Set icon (once, as the default for every window the application opens)
+        self._icon_image = None
         icon_path = get_icon_path()
         if icon_path:
             try:
-                self.root.iconbitmap(icon_path) if icon_path.endswith('.ico') else \
-                self.root.iconphoto(True, tk.PhotoImage(file=icon_path))
+                if icon_path.endswith('.ico'):
+                    self.root.iconbitmap(default=icon_path)
+                else:
+                    self._icon_image = tk.PhotoImage(file=icon_path)
+                    self.root.iconphoto(True, self._icon_image)
             except Exception as e:
                 print(f"Warning: Could not set icon for main window: {str(e)}")
         
@@ -434,9 +3477,24 @@ class MainApplication:
         self.splash.update_status("Loading application...", 0)
         
         # Initialize variables
-        self.excel_data = None
+        self.specimens = None  # SpecimenStore for the loaded workbook
         self.montana_counties = None
+        self.montana_outline = None  # Dissolved state boundary, same CRS as montana_counties
+        self.montana_boundary = None  # Prepared outline for point-in-polygon tests
+        self.county_layer = None  # CountyBaseLayer drawn under the dots
+        self.tile_cache = TileCache()  # Topographic background tiles
+        self.hillshade = None  # HillshadeCache for the chosen DEM
+        self.render_cache = RenderCache()  # Previously exported maps
+        self._export_rasterizer = None  # (base map key, DotRasterizer) reused by TIFF/PNG exports
         self.current_dots = None  # Will store the dot data
+        self.coordinate_cache = CoordinateCache()  # Parsed localities, shared by every workbook
+        self.taxonomy = None  # TaxonomyIndex over the specimen store
+        self.selection_cache = SelectionCache()  # Points of recently viewed selections
+        self._preview_points = self._empty_preview()  # Points shown while a workbook streams in
+        self.diagnostics_window = None
+        if os.environ.get(DIAGNOSTICS_ENV):
+            diagnostics.set_trace_memory(os.environ[DIAGNOSTICS_ENV] != 'timings')
+            diagnostics.enable()
         
         # Add variables for species selection
         self.selected_family = tk.StringVar()
@@ -450,12 +3508,20 @@ class MainApplication:
         # Initialize notification system
         self.toast = ToastNotification(self.root)
         
+        # Long pipelines run on worker threads; results come back via the mainloop
+        self.worker = BackgroundWorker(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Set up the GUI
         self.initialize_gui()
         
         # Destroy splash screen and show main window
         self.splash.destroy()
         self.root.deiconify()
+        self._mark_startup('window')
+        
+        # The heavy libraries are imported once the event loop is running
+        self.root.after(0, self._load_libraries)
 
     def initialize_gui(self):
         # Configure style
@@ -478,9 +3544,6 @@ class MainApplication:
         
         self._setup_input_fields()
         self._setup_map_display()
-        
-        # Bind resize event
-        self.root.bind('<Configure>', self.on_window_resize)
 
     def _setup_input_fields(self):
         # File selection
@@ -528,31 +3591,190 @@ class MainApplication:
         self.show_county_lines = tk.BooleanVar(value=True)
         ttk.Checkbutton(options_frame, text="Show County Lines", variable=self.show_county_lines).pack(anchor='w')
         
+        # Topographic background from the tile cache
+        self.show_topo_background = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Show Topographic Background", variable=self.show_topo_background).pack(anchor='w')
+        
+        # Hillshaded terrain from a local DEM (works offline)
+        self.show_terrain_relief = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Show Terrain Relief (DEM)", variable=self.show_terrain_relief,
+                        command=self.toggle_terrain_relief).pack(anchor='w')
+        ttk.Button(options_frame, text="Choose DEM...", command=self.choose_dem).pack(anchor='w', padx=(20, 0))
+        
+        # One marker per collection site, sized by its number of specimens
+        self.group_by_site = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Group Dots by Site", variable=self.group_by_site).pack(anchor='w')
+        site_frame = ttk.Frame(options_frame)
+        site_frame.pack(fill='x', padx=(20, 0))
+        ttk.Label(site_frame, text="Merge sites within (m):").pack(side='left')
+        self.site_tolerance_var = tk.StringVar(value="0")
+        ttk.Entry(site_frame, textvariable=self.site_tolerance_var, width=8).pack(side='right')
+        
+        # Density raster for very large selections (drawn instead of dots or sites)
+        self.show_density = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Show Density Instead of Dots", variable=self.show_density).pack(anchor='w')
+        self.smooth_density = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options_frame, text="Smooth Density", variable=self.smooth_density).pack(anchor='w', padx=(20, 0))
+        
+        # Progressive preview for large (streamed) workbooks
+        self.preview_while_loading = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options_frame, text="Preview Dots While Loading", variable=self.preview_while_loading).pack(anchor='w')
+        
+        # Download format
+        ttk.Label(options_frame, text="Download Format:").pack(anchor='w', pady=(10, 5))
+        self.export_format = tk.StringVar(value="TIFF (LZW)")
+        ttk.Combobox(options_frame, textvariable=self.export_format, values=list(EXPORT_PRESETS),
+                     state='readonly').pack(fill='x')
+        
         # Action buttons
         ttk.Button(self.left_panel, text="Generate Dot Map", command=self.generate_dot_map).pack(fill='x', pady=(10, 5))
         ttk.Button(self.left_panel, text="Download Dot Map", command=self.download_map).pack(fill='x', pady=(5, 0))
+        ttk.Button(self.left_panel, text="Diagnostics", command=self.show_diagnostics).pack(fill='x', pady=(5, 0))
         
         # Bind dropdowns
         self.family_dropdown.bind("<<ComboboxSelected>>", self.update_genus_dropdown)
         self.genus_dropdown.bind("<<ComboboxSelected>>", self.update_species_dropdown)
 
+    def toggle_terrain_relief(self):
+        """Ask for an elevation GeoTIFF the first time terrain relief is switched on"""
+        if self.show_terrain_relief.get() and self.hillshade is None:
+            self.choose_dem()
+
+    def choose_dem(self):
+        """Ask for an elevation GeoTIFF and shade the terrain from it (replacing any earlier DEM)"""
+        if import_rasterio() is None:
+            self.show_terrain_relief.set(False)
+            self.toast.show_toast("Terrain relief needs the rasterio package", error=True)
+            return
+        dem_path = filedialog.askopenfilename(
+            title="Choose Elevation Raster (DEM)",
+            filetypes=[("GeoTIFF files", "*.tif *.tiff"), ("All files", "*.*")]
+        )
+        if not dem_path:
+            # Keep the DEM already in use, if there is one
+            if self.hillshade is None:
+                self.show_terrain_relief.set(False)
+            return
+        self.hillshade = HillshadeCache(dem_path)
+        self.show_terrain_relief.set(True)
+        if self.current_dots is not None:
+            self.toast.show_toast(f"Using {os.path.basename(dem_path)}: generate the map again to shade it")
+
     def choose_color(self):
         """Open color picker dialog and update the color variable"""
         from tkinter import colorchooser
         color = colorchooser.askcolor(title="Choose Dot Color", color=self.dot_color_var.get())
         if color[1]:  # If a color was selected
             self.dot_color_var.set(color[1])
+            self.display_dot_map()
 
     def _setup_map_display(self):
-        self.figure = Figure(figsize=(10, 8))
+        # The map canvas needs matplotlib, so it is built by _ensure_map_display
+        # once the libraries have been imported in the background
+        self.figure = None
+        self.canvas = None
+        self.map_placeholder = ttk.Label(self.right_panel, text="Loading map...", anchor='center')
+        self.map_placeholder.pack(fill='both', expand=True)
+
+    def _ensure_map_display(self):
+        """Build the map canvas (waiting for the background imports if they are still running)"""
+        if self.canvas is not None:
+            return
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        self.map_placeholder.destroy()
+        self.figure = Figure(figsize=EXPORT_FIGSIZE)
         self.ax = self.figure.add_subplot(111)
         # Remove the box from initial display
         self.ax.set_frame_on(False)
         self.ax.set_xticks([])
         self.ax.set_yticks([])
         self.canvas = FigureCanvasTkAgg(self.figure, master=self.right_panel)
+        self.blit = BlitManager(self.canvas)
+        self._base_map_key = None  # (county layer, show county lines, background and relief sources) last drawn
+        self._map_layers = {}  # 'background' / 'relief': (cache, source, (image, extent)) last drawn
+        self._pending_layers = {}  # 'background' / 'relief': source being built on the worker
+        self._map_size = None  # Last map panel size in pixels
+        self._resize_event = None  # Latest <Configure> event, applied once the size settles
+        self._resize_job = None
+        self._resize_preview = None  # Last frame and its scaled PhotoImage, shown while resizing
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill='both', expand=True)
+        
+        # Bind resize event on the map canvas itself (this replaces matplotlib's own
+        # handler, which redraws on every event). A root binding would also fire
+        # for every child widget.
+        self.canvas.get_tk_widget().bind('<Configure>', self.on_window_resize)
+        self._mark_startup('map')
+
+    def _load_libraries(self):
+        """Import the heavy libraries on a background thread, then build the map canvas"""
+        self._mark_startup('interactive')
+        thread = threading.Thread(target=warm_up_imports, name='warm-up-imports', daemon=True)
+        thread.start()
+
+        def check():
+            if thread.is_alive():
+                self.root.after(50, check)
+                return
+            self._mark_startup('libraries')
+            self._ensure_map_display()
+            self._startup_finished()
+        check()
+
+    def _mark_startup(self, phase):
+        self._startup.setdefault(phase, time.time())
+
+    def _startup_finished(self):
+        """Record the startup times (and report them and exit when started for a startup report)"""
+        def since_start(phase):
+            return self._startup[phase] - MODULE_STARTED
+        
+        diagnostics.record('startup', 'window', since_start('interactive'))
+        diagnostics.record('startup', 'map', since_start('map'))
+        report_path = os.environ.get(STARTUP_REPORT_ENV)
+        if report_path:
+            print(f"Startup: window ready after {since_start('interactive'):.2f} s, "
+                  f"map after {since_start('map'):.2f} s")
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump({'module_started': MODULE_STARTED, 'phases': self._startup}, f, indent=2)
+            self.root.after_idle(self.on_close)
+
+    def show_diagnostics(self):
+        """Open the diagnostics window (or bring the open one to the front)"""
+        if self.diagnostics_window is None or not self.diagnostics_window.window.winfo_exists():
+            self.diagnostics_window = DiagnosticsWindow(self.root, diagnostics)
+        self.diagnostics_window.show()
+
+    def _run_job(self, key, message, func, on_done, on_error, on_finish=None):
+        """Run ``func(job)`` on the worker behind a cancellable loading indicator"""
+        def cancel():
+            self.worker.cancel(job)
+
+        def finish():
+            loading.destroy()
+            if on_finish:
+                on_finish()
+        
+        loading = LoadingIndicator(self.root, message, on_cancel=cancel)
+        job = self.worker.submit(
+            key,
+            func,
+            on_done=on_done,
+            on_error=on_error,
+            on_progress=loading.update_message,
+            on_finish=finish
+        )
+        return job
+
+    def _error_toast(self, prefix):
+        """Error handler for background jobs that reports failures as a toast"""
+        def show(error):
+            if isinstance(error, NothingToMapError):
+                self.toast.show_toast(str(error), error=True)
+            else:
+                self.toast.show_toast(f"{prefix}: {str(error)}", error=True)
+        return show
 
     def load_excel(self):
         file_path = filedialog.askopenfilename(
@@ -560,423 +3782,498 @@ class MainApplication:
         )
         if not file_path:
             return
+        
+        # Snapshot what the job needs; it must not touch Tk variables or widgets
+        montana_counties = self.montana_counties
+        montana_outline = self.montana_outline
+        montana_boundary = self.montana_boundary
+        county_layer = self.county_layer
+        preview = self.preview_while_loading.get()
+        coordinate_cache = self.coordinate_cache
+        self._preview_points = self._empty_preview()
+
+        def load(job):
+            nonlocal montana_counties, montana_outline, montana_boundary, county_layer
             
-        try:
-            # Show loading indicator
-            loading = LoadingIndicator(self.root, "Loading Excel file...")
-            
-            self.excel_data = pd.read_excel(file_path)
-            required_columns = ['lat', 'lat_dir', 'long', 'long_dir', 'family', 'genus', 'species', 'year']
-            if not all(col in self.excel_data.columns for col in required_columns):
-                loading.destroy()
-                raise ValueError("Excel file must contain 'lat', 'lat_dir', 'long', 'long_dir', 'family', 'genus', 'species', and 'year' columns")
-                
-            self.file_path_var.set(file_path)
-            
-            # Process the data
-            loading.update_message("Processing data...")
-            for col in ["family", "genus", "species"]:
-                self.excel_data[col] = self.excel_data[col].astype(str).str.strip().str.lower()
-            
-            # Convert year to numeric, handling any non-numeric values
-            self.excel_data['year'] = pd.to_numeric(self.excel_data['year'], errors='coerce')
-            
-            # Get valid families (non-empty/non-null values)
-            loading.update_message("Updating dropdowns...")
-            valid_families = sorted(self.excel_data["family"].dropna().unique())
-            valid_families = [f for f in valid_families if str(f).strip() and str(f).lower() != 'nan']  # Remove empty strings and 'nan'
-            
-            # Capitalize family names
-            family_values = ["All"] + [f.title() for f in valid_families]
-            
-            # Update Family dropdown
-            self.family_dropdown["values"] = family_values
-            self.family_dropdown.set("Select Family")
-            
-            # Reset other dropdowns
-            self.genus_dropdown.set("Select Genus")
-            self.genus_dropdown["values"] = []
-            self.species_dropdown.set("Select Species")
-            self.species_dropdown["values"] = []
-            
-            # Load Montana counties
-            loading.update_message("Loading Montana counties...")
-            all_counties = gpd.read_file(resource_path("shapefiles/cb_2021_us_county_5m.shp"))
-            self.montana_counties = all_counties[all_counties['STATEFP'] == '30']
-            self.montana_counties = self.montana_counties.to_crs("EPSG:32100")
-            
-            # Bind dropdowns
-            self.family_dropdown.bind("<<ComboboxSelected>>", self.update_genus_dropdown)
-            self.genus_dropdown.bind("<<ComboboxSelected>>", self.update_species_dropdown)
-            
-            # Destroy loading indicator
-            loading.destroy()
+            # Load Montana counties first (once per session, from the on-disk cache when possible)
+            # so dots can be previewed while a large workbook streams in
+            if montana_counties is None:
+                job.progress("Loading Montana counties...")
+                with diagnostics.span('load', 'counties') as span:
+                    montana_counties, montana_outline = load_montana_counties()
+                    montana_boundary = MontanaBoundary(montana_outline)
+                    county_layer = CountyBaseLayer(montana_counties, montana_boundary)
+                    span.set(rows_out=len(montana_counties))
+                job.call_in_ui(self._set_county_layer, montana_counties, montana_outline,
+                               montana_boundary, county_layer)
             
-            # Show summary dialog
-            SummaryDialog(self.root, file_path, self.excel_data)
+            def preview_chunk(chunk, rows_loaded):
+                coords = chunk.coordinates
+                inside = montana_boundary.contains_xy(coords.lon, coords.lat, WGS84_CRS)
+                x, y = chunk.xy(WEB_MERCATOR_CRS)
+                job.call_in_ui(self._show_loading_preview, x[inside], y[inside], rows_loaded)
             
-            self.toast.show_toast("Excel file loaded successfully")
+            # Read the workbook (or its cached specimen table if unchanged since last time)
+            specimens = load_specimen_workbook(
+                file_path,
+                coordinate_cache,
+                progress=job.progress,
+                on_chunk=preview_chunk if preview else None
+            )
             
-        except Exception as e:
-            if 'loading' in locals():
-                loading.destroy()
-            self.toast.show_toast(f"Error loading file: {str(e)}", error=True)
+            # The taxonomy index is built once (or grown chunk by chunk while streaming)
+            # so the dropdowns and filtering are lookups
+            job.progress("Updating dropdowns...")
+            with diagnostics.span('load', 'taxonomy', rows_in=len(specimens)):
+                specimens.taxonomy
+            return specimens
+        
+        self._run_job(
+            'load',
+            "Loading Excel file...",
+            load,
+            on_done=lambda specimens: self._excel_loaded(file_path, specimens),
+            on_error=self._error_toast("Error loading file"),
+            on_finish=self._end_loading_preview if preview else None
+        )
 
-    def dms_to_decimal(self, coord):
-        """
-        Convert a coordinate in DMS format (e.g., '44°41.576'') to decimal degrees.
-        Handles both unicode and ascii degree/minute/second symbols.
-        """
-        if isinstance(coord, float) or isinstance(coord, int):
-            return float(coord)
-        if not isinstance(coord, str):
-            return float('nan')
-        # Remove unwanted characters and normalize
-        coord = coord.replace("'", "'").replace("″", '"').replace("""", '"').replace(""", '"')
-        dms_pattern = r"(\d+)[°\s]+(\d+(?:\.\d+)?)[\'′]?\s*(\d*(?:\.\d+)?)[\"″]?"
-        match = re.match(dms_pattern, coord.strip())
-        if match:
-            deg = float(match.group(1))
-            min_ = float(match.group(2))
-            sec = float(match.group(3)) if match.group(3) else 0.0
-            return deg + min_ / 60 + sec / 3600
-        try:
-            return float(coord)
-        except Exception:
-            return float('nan')
+    def _set_county_layer(self, counties, outline, boundary, layer):
+        self.montana_counties = counties
+        self.montana_outline = outline
+        self.montana_boundary = boundary
+        self.county_layer = layer
 
-    def convert_coordinates(self, row):
-        """Convert coordinates taking into account direction (N/S, E/W) and DMS/decimal formats"""
-        try:
-            # Handle potential data type issues
-            lat_val = row['lat']
-            long_val = row['long']
-            lat_dir_val = row['lat_dir']
-            long_dir_val = row['long_dir']
-            
-            # Skip if coordinates are missing or invalid
-            if pd.isna(lat_val) or pd.isna(long_val):
-                return Point(0, 0)  # Will be filtered out
-            
-            # Convert coordinates
-            lat = self.dms_to_decimal(lat_val)
-            long = self.dms_to_decimal(long_val)
-            
-            # Skip if conversion failed
-            if pd.isna(lat) or pd.isna(long):
-                return Point(0, 0)  # Will be filtered out
-            
-            # Handle direction values more robustly
-            lat_dir = 'N'  # Default for Montana
-            long_dir = 'W'  # Default for Montana
-            
-            # Only process direction if it's a valid string
-            if pd.notna(lat_dir_val) and isinstance(lat_dir_val, str):
-                lat_dir = lat_dir_val.strip().upper()
-                if lat_dir not in ['N', 'S']:
-                    lat_dir = 'N'  # Default to North for Montana
-            
-            if pd.notna(long_dir_val) and isinstance(long_dir_val, str):
-                long_dir = long_dir_val.strip().upper()
-                if long_dir not in ['E', 'W']:
-                    long_dir = 'W'  # Default to West for Montana
-            
-            # Adjust for direction
-            if lat_dir == 'S':  # If Southern hemisphere
-                lat = -lat
-            if long_dir == 'W':  # If Western hemisphere
-                long = -long
-            
-            # Montana is roughly between 44°N to 49°N and 104°W to 116°W
-            # Validate the coordinates are somewhat reasonable
-            if not (44 <= abs(lat) <= 49 and 104 <= abs(long) <= 116):
-                # Don't print warning for every coordinate, just return invalid point
-                return Point(0, 0)  # Will be filtered out
-            
-            return Point(long, lat)
-        except Exception as e:
-            # Don't print error for every coordinate, just return invalid point
-            return Point(0, 0)  # Will be filtered out
+    def _excel_loaded(self, file_path, specimens):
+        """Apply a loaded workbook to the UI (runs on the Tk thread)"""
+        self.specimens = specimens
+        self.taxonomy = specimens.taxonomy
+        self.selection_cache = SelectionCache()
+        self.file_path_var.set(file_path)
+        
+        # The previous map (and any loading preview) belonged to the old workbook
+        self.current_dots = None
+        self._draw_map()
+        
+        # Capitalize family names
+        family_values = ["All"] + [f.title() for f in self.taxonomy.families()]
+        
+        # Update Family dropdown
+        self.family_dropdown["values"] = family_values
+        self.family_dropdown.set("Select Family")
+        
+        # Reset other dropdowns
+        self.genus_dropdown.set("Select Genus")
+        self.genus_dropdown["values"] = []
+        self.species_dropdown.set("Select Species")
+        self.species_dropdown["values"] = []
+        
+        # Bind dropdowns
+        self.family_dropdown.bind("<<ComboboxSelected>>", self.update_genus_dropdown)
+        self.genus_dropdown.bind("<<ComboboxSelected>>", self.update_species_dropdown)
+        
+        # Show summary dialog
+        SummaryDialog(self.root, file_path, self.specimens)
+        
+        self.toast.show_toast("Excel file loaded successfully")
+
+    def _end_loading_preview(self):
+        """Put the current map back in place of the loading preview (after a failed or cancelled load too)"""
+        if self._preview_points[2]:
+            self._preview_points = self._empty_preview()
+            self._draw_map(self.current_dots)
+
+    @staticmethod
+    def _empty_preview():
+        """Preview point buffers (x, y) and the number of points in use"""
+        return np.empty(0), np.empty(0), 0
+
+    def _show_loading_preview(self, x, y, rows_loaded):
+        """Put the specimens read so far on the map while a large workbook streams in"""
+        # The buffers grow by doubling, so each chunk copies only its own points
+        buffer_x, buffer_y, count = self._preview_points
+        if count + len(x) > len(buffer_x):
+            capacity = max(2 * len(buffer_x), count + len(x))
+            grown_x, grown_y = np.empty(capacity), np.empty(capacity)
+            grown_x[:count], grown_y[:count] = buffer_x[:count], buffer_y[:count]
+            buffer_x, buffer_y = grown_x, grown_y
+        buffer_x[count:count + len(x)] = x
+        buffer_y[count:count + len(y)] = y
+        count += len(x)
+        self._preview_points = (buffer_x, buffer_y, count)
+        
+        # The preview is never the current map, so it can't be exported
+        self._draw_map({
+            'x': buffer_x[:count],
+            'y': buffer_y[:count],
+            'species_info': None,
+            'title': f"Specimen locations loaded so far ({rows_loaded:,} records read)",
+            'count': count
+        })
 
     def generate_dot_map(self):
-        if self.excel_data is None:
+        if self.specimens is None:
             self.toast.show_toast("Please load an Excel file first", error=True)
             return
-            
+        
         if self.montana_counties is None:
             self.toast.show_toast("Please load an Excel file first to initialize county data", error=True)
             return
-            
-        try:
-            loading = LoadingIndicator(self.root, "Generating dot map...")
-            
-            # Validate required columns
-            required_columns = ['lat', 'lat_dir', 'long', 'long_dir', 'family', 'genus', 'species', 'year']
-            if not all(col in self.excel_data.columns for col in required_columns):
-                loading.destroy()
-                raise ValueError("Excel file must contain 'lat', 'lat_dir', 'long', 'long_dir', 'family', 'genus', 'species', and 'year' columns")
-            
-            # Get species selection
-            fam = self.selected_family.get().strip()
-            gen = self.selected_genus.get().strip()
-            spec = self.selected_species.get().strip()
-            
-            if not fam or fam == "Select Family" or not gen or gen == "Select Genus" or not spec or spec == "Select Species":
-                loading.destroy()
-                messagebox.showerror("Missing Input", "Please select Family, Genus, and Species.")
-                return
-            
-            loading.update_message("Filtering data...")
-            
-            # Filter data based on species selection
-            filtered = self.excel_data.copy()
-            
-            if fam == "All":
-                filtered = filtered[filtered["family"].notna() & (filtered["family"].str.strip() != "")]
-            else:
-                filtered = filtered[filtered["family"].str.lower() == fam.lower()]
-                
-            if gen == "All":
-                filtered = filtered[filtered["genus"].notna() & (filtered["genus"].str.strip() != "")]
-            else:
-                filtered = filtered[filtered["genus"].str.lower() == gen.lower()]
-                
-            if spec == "all":
-                filtered = filtered[filtered["species"].notna() & (filtered["species"].str.strip() != "")]
-            else:
-                filtered = filtered[filtered["species"].str.lower() == spec.lower()]
-            
-            if len(filtered) == 0:
-                loading.destroy()
-                self.toast.show_toast("No data found for selected species", error=True)
-                return
-            
-            loading.update_message("Converting coordinates...")
-            
-            # Convert coordinates to points
-            geometries = filtered.apply(self.convert_coordinates, axis=1)
-            points = gpd.GeoDataFrame(
-                filtered,
-                geometry=geometries,
-                crs="EPSG:4326"
-            )
-            
-            # Filter points within Montana
-            montana_boundary = self.montana_counties.dissolve().to_crs("EPSG:4326").geometry.iloc[0]
-            points = points[points.geometry.within(montana_boundary)]
-            
-            if len(points) == 0:
-                loading.destroy()
-                self.toast.show_toast("No points found within Montana's boundaries", error=True)
-                return
-            
-            # Store the filtered points data
-            self.current_dots = {
-                'points': points,
-                'species_info': f"{fam} > {gen} > {spec}",
-                'count': len(points)
-            }
-            
-            # Display the dot map
-            loading.update_message("Rendering dot map...")
-            self.display_dot_map()
-            
-            loading.destroy()
-            self.toast.show_toast(f"Dot map generated with {len(points)} specimens")
-            
-        except Exception as e:
-            if 'loading' in locals():
-                loading.destroy()
-            self.toast.show_toast(f"Error generating dot map: {str(e)}", error=True)
-
-    def display_dot_map(self):
-        """Display simple dot map with Montana counties and specimen locations"""
-        if self.current_dots is None:
-            return
         
-        # Clear the figure
-        self.figure.clf()
+        # Get species selection
+        fam = self.selected_family.get().strip()
+        gen = self.selected_genus.get().strip()
+        spec = self.selected_species.get().strip()
         
-        # Create single subplot
-        self.ax = self.figure.add_subplot(111)
+        if not fam or fam == "Select Family" or not gen or gen == "Select Genus" or not spec or spec == "Select Species":
+            messagebox.showerror("Missing Input", "Please select Family, Genus, and Species.")
+            return
         
-        # Configure axis
-        self.ax.set_frame_on(False)
-        self.ax.set_xticks([])
-        self.ax.set_yticks([])
-        self.ax.set_aspect('equal')
+        site_tolerance = None
+        if self.group_by_site.get():
+            try:
+                site_tolerance = float(self.site_tolerance_var.get() or 0)
+            except ValueError:
+                site_tolerance = -1
+            if not 0 <= site_tolerance <= SITE_TOLERANCE_MAX:
+                messagebox.showerror("Invalid Input", f"Site distance must be a number of metres from 0 (exact "
+                                                      f"coordinates) to {SITE_TOLERANCE_MAX:,}.")
+                return
         
-        # Get points data and convert to Web Mercator projection
-        points = self.current_dots['points']
-        points_web_mercator = points.to_crs(epsg=3857)
+        density_smoothing = None
+        if self.show_density.get():
+            density_smoothing = DENSITY_SMOOTHING if self.smooth_density.get() else 0.0
         
-        # Get Montana counties in Web Mercator projection
-        counties_web_mercator = self.montana_counties.to_crs(epsg=3857)
+        specimens = self.specimens
+        selection_cache = self.selection_cache
+        montana_boundary = self.montana_boundary
+        tile_cache = self.tile_cache
+        hillshade = self.hillshade if self.show_terrain_relief.get() else None
+        self._ensure_map_display()
+        canvas_size = self.canvas.get_width_height()
+        show_topo_background = self.show_topo_background.get()
+        extent = map_extent(self.county_layer.bounds)
+        selection = (
+            self._taxon_key(fam, "All"),
+            self._taxon_key(gen, "All"),
+            self._taxon_key(spec, "all")
+        )
+
+        def generate(job):
+            job.progress("Filtering data...")
+            
+            # Selections viewed recently are reused as they are
+            with diagnostics.span('generate', 'select', rows_in=len(specimens)) as span:
+                dots = selection_cache.get(selection)
+                span.set(cache='hit' if dots is not None else 'miss')
+                if dots is None:
+                    dots = select_dots(specimens, montana_boundary, *selection)
+                    selection_cache.put(selection, dots)
+                span.set(rows_out=dots['count'], rejected=dots['rejected'], cache_stats=selection_cache.stats())
+            dots = dict(dots, species_info=f"{fam} > {gen} > {spec}")
+            if density_smoothing is not None:
+                with diagnostics.span('generate', 'density', rows_in=dots['count']) as span:
+                    dots = density_layer(dots, extent, montana_boundary, density_smoothing)
+                    span.set(rows_out=dots['density'][0].size)
+            elif site_tolerance is not None:
+                with diagnostics.span('generate', 'sites', rows_in=dots['count']) as span:
+                    dots = aggregate_sites(dots, specimens, site_tolerance)
+                    span.set(rows_out=dots['sites'])
+            # Fetch missing tiles and compute the relief here so drawing only reads caches
+            if show_topo_background:
+                job.progress("Loading topographic background...")
+                with diagnostics.span('generate', 'background'):
+                    tile_cache.mosaic(extent, canvas_size)
+            if hillshade is not None:
+                job.progress("Shading terrain relief...")
+                with diagnostics.span('generate', 'relief'):
+                    hillshade.relief(extent, canvas_size)
+            job.progress("Rendering dot map...")
+            return dots
+
+        def show(dots):
+            # Display the dot map (which stores the filtered points once drawn)
+            self.display_dot_map(dots)
+            sites = f" at {dots['sites']:,} sites" if 'sites' in dots else ""
+            rejected = dots.get('rejected')
+            skipped = (f" (skipped {sum(rejected.values()):,} records: {format_rejection_counts(rejected)})"
+                       if rejected else "")
+            self.toast.show_toast(f"Dot map generated with {dots['count']} specimens{sites}{skipped}")
         
-        # Get bounds for the map
-        bounds = counties_web_mercator.total_bounds
-        padding = (bounds[2] - bounds[0]) * 0.05  # Small padding
+        # A newer "Generate" request supersedes one that is still running
+        self._run_job('generate', "Generating dot map...", generate, show, self._error_toast("Error generating dot map"))
+
+    def display_dot_map(self, dots=None):
+        """Display simple dot map with Montana counties and specimen locations
         
-        # Set the plot bounds
-        self.ax.set_xlim([bounds[0] - padding, bounds[2] + padding])
-        self.ax.set_ylim([bounds[1] - padding, bounds[3] + padding])
+        New dots only replace current_dots once they have been drawn, so a map
+        that fails to draw leaves the previous one in place for exports.
+        """
+        if dots is None:
+            dots = self.current_dots
+        if dots is None:
+            return
+        self._draw_map(dots)
+        self.current_dots = dots
+
+    def _draw_map(self, dots=None):
+        """Draw the base map and ``dots`` (if any) without making them the current map"""
+        if self.county_layer is None:
+            return
+        self._ensure_map_display()
         
-        # Simple color scheme
-        colors = {
-            'county_border': '#000000',      # Black county borders
-            'county_fill': '#f8f9fa',        # Light gray fill for counties
-            'dots': self.dot_color_var.get(), # User-selected dot color
-            'text': '#000000'                # Black text
-        }
+        # The static layers are only rebuilt when they change; switching species or
+        # dot color redraws just the dots, title and legend over the cached background
+        show_county_lines = self.show_county_lines.get()
+        background_source, background = self._topo_background()
+        relief_source, relief = self._terrain_relief()
+        base_map_key = (
+            self.county_layer,
+            show_county_lines,
+            json.dumps(background_source),
+            json.dumps(relief_source)
+        )
+        if base_map_key != self._base_map_key:
+            with diagnostics.span('display', 'base_map'):
+                self.blit.set_artists([])
+                self.ax = draw_base_map(self.figure, self.county_layer, show_county_lines, background, relief)
+                self._base_map_key = base_map_key
+                self.blit.invalidate()
         
-        # Plot county boundaries with simple styling (only if checkbox is checked)
-        if self.show_county_lines.get():
-            for idx, county in counties_web_mercator.iterrows():
-                self.ax.fill(county.geometry.exterior.xy[0], 
-                            county.geometry.exterior.xy[1],
-                            facecolor=colors['county_fill'],     # Light gray fill
-                            edgecolor=colors['county_border'],   # Black borders
-                            linewidth=0.8,
-                            alpha=1.0,
-                            zorder=5)
+        if dots is None:
+            self.blit.set_artists([])
         else:
-            # Show Montana's outer boundary when county lines are hidden
-            montana_boundary = counties_web_mercator.dissolve().geometry.iloc[0]
-            self.ax.fill(montana_boundary.exterior.xy[0], 
-                        montana_boundary.exterior.xy[1],
-                        facecolor='white',                      # White fill
-                        edgecolor=colors['county_border'],      # Black outer border
-                        linewidth=1.5,                         # Slightly thicker border
-                        alpha=1.0,
-                        zorder=5)
-        
-        # Extract coordinates for plotting dots
-        x_coords = [point.x for point in points_web_mercator.geometry]
-        y_coords = [point.y for point in points_web_mercator.geometry]
-        
-        # Plot dots with simple styling
-        self.ax.scatter(x_coords, y_coords, 
-                       c=colors['dots'],     # Red dots
-                       s=25,                 # Appropriate size
-                       alpha=1.0,           # Full opacity
-                       edgecolors='none',   # No border
-                       linewidth=0,         # No line
-                       zorder=15)           # Ensure dots are on top
-        
-        # Add title
-        species_info = self.current_dots['species_info']
-        if species_info:
-            family, genus, species = species_info.split(' > ')
-            title = f"Known geographic distribution of {genus} {species} in Montana"
-            self.figure.suptitle(title, x=0.5, y=0.98, 
-                               ha='center', va='top',
-                               fontsize=12, fontweight='normal',
-                               color=colors['text'],
-                               style='italic')
-        
-        # Add legend
-        import matplotlib.patches as mpatches
-        legend_elements = [
-            mpatches.Patch(facecolor=colors['dots'], 
-                          edgecolor='none',
-                          label=f'Specimen Location ({self.current_dots["count"]} total)')
-        ]
-        
-        legend = self.ax.legend(handles=legend_elements,
-                              loc='lower right',
-                              frameon=False,
-                              fontsize=10,
-                              title_fontsize=10)
-        
-        # Add north arrow
-        self.ax.annotate('N', xy=(0.05, 0.95), xycoords='axes fraction',
-                        fontsize=14, fontweight='bold',
-                        color=colors['text'],
-                        ha='center', va='center')
-        
-        # Add scale bar (accurately calculated for 100 km)
-        # Calculate the actual distance in meters for 100 km at Montana's latitude
-        # Montana is roughly at 47°N latitude
-        import math
-        lat_rad = math.radians(47)  # Montana's approximate latitude
-        # Web Mercator projection scale factor at this latitude
-        scale_factor = 1 / math.cos(lat_rad)
-        
-        # Calculate 100 km in Web Mercator units
-        # 1 degree longitude ≈ 111,320 meters at equator
-        # At 47°N, 1 degree longitude ≈ 111,320 * cos(47°) meters
-        meters_per_degree = 111320 * math.cos(lat_rad)
-        km_100_in_degrees = 100000 / meters_per_degree
-        
-        # Convert to Web Mercator projection units
-        scale_length_meters = km_100_in_degrees * 111320 * scale_factor
-        
-        # Position scale bar in bottom-left corner
-        scale_x = bounds[0] + (bounds[2] - bounds[0]) * 0.05  # 5% from left edge
-        scale_y = bounds[1] + (bounds[3] - bounds[1]) * 0.05  # 5% from bottom edge
-        
-        # Draw the scale bar
-        self.ax.plot([scale_x, scale_x + scale_length_meters], [scale_y, scale_y], 
-                    color=colors['text'], linewidth=2)
-        self.ax.text(scale_x + scale_length_meters/2, scale_y - (bounds[3] - bounds[1]) * 0.02,
-                    '100 km', ha='center', va='top',
-                    fontsize=8, color=colors['text'])
-        
-        # Adjust layout
-        self.figure.subplots_adjust(left=0.05, right=0.95, 
-                                  bottom=0.05, top=0.92)
+            with diagnostics.span('display', 'dot_layer', rows_in=dots['count']):
+                self.blit.set_artists(draw_dot_layer(
+                    self.figure,
+                    self.ax,
+                    dots,
+                    dot_color=self.dot_color_var.get(),
+                    clip_path=self.county_layer.outline_paths[0]
+                ))
         
         # Draw the canvas
-        self.canvas.draw()
+        with diagnostics.span('display', 'draw'):
+            self.blit.update()
+
+    def _topo_background(self):
+        """The topographic mosaic for the canvas and its source (never downloads on the Tk thread)"""
+        if not self.show_topo_background.get() or self.county_layer is None:
+            return None, None
+        tile_cache = self.tile_cache
+        extent = map_extent(self.county_layer.bounds)
+        size = self.canvas.get_width_height()
+        source = tile_cache.source(extent, size)
+        return self._map_layer(
+            'background', tile_cache, source,
+            lambda: tile_cache.mosaic(extent, size, download=False) if not source[-1] else None,
+            lambda: tile_cache.mosaic(extent, size)
+        )
+
+    def _terrain_relief(self):
+        """The terrain relief for the canvas and its source (computed on the worker)"""
+        if not self.show_terrain_relief.get() or self.hillshade is None or self.county_layer is None:
+            return None, None
+        hillshade = self.hillshade
+        extent = map_extent(self.county_layer.bounds)
+        size = self.canvas.get_width_height()
+        return self._map_layer(
+            'relief', hillshade, hillshade.source(extent, size),
+            lambda: hillshade.relief(extent, size, compute=False),
+            lambda: hillshade.relief(extent, size)
+        )
 
+    def _map_layer(self, name, cache, source, cached, fetch):
+        """
+        The ``name`` layer as (source, (image, extent)): ``cached()`` when it is
+        ready for this canvas size, otherwise the one last drawn from the same
+        ``cache`` (imshow stretches it over the map extent) while ``fetch()``
+        builds this size on the worker and redraws the map once it is done.
+        """
+        last = self._map_layers.get(name)
+        if last is not None and last[0] is cache and last[1] == source:
+            return source, last[2]
+        layer = cached()
+        if layer is not None:
+            self._map_layers[name] = (cache, source, layer)
+            return source, layer
+        
+        # A size that failed stays pending, so redraws don't keep retrying it
+        if self._pending_layers.get(name) != source:
+            self._pending_layers[name] = source
 
+            def done(layer):
+                self._pending_layers.pop(name, None)
+                self._map_layers[name] = (cache, source, layer)
+                self.display_dot_map()
+            
+            self.worker.submit(f"map-{name}", lambda job: fetch(), on_done=done,
+                               on_error=self._error_toast(f"Error drawing the map {name}"))
+        if last is not None and last[0] is cache:
+            return last[1], last[2]
+        return None, None
 
     def download_map(self):
         if self.current_dots is None:
             self.toast.show_toast("Please generate dot map first", error=True)
             return
+        
+        import datetime
+        from pathlib import Path
+        
+        # Get Downloads folder path
+        downloads_path = str(Path.home() / "Downloads")
+        
+        # Get current date and time in the desired format
+        now = datetime.datetime.now()
+        timestamp = now.strftime("%I_%M_%p_%m_%d_%Y")  # e.g., 12_49_PM_6_12_2025
+        
+        # Create a meaningful filename
+        fmt, compression, tiled = EXPORT_PRESETS[self.export_format.get()]
+        tiled_fallback = tiled and not has_tifffile()
+        tiled = tiled and not tiled_fallback
+        filename = f"MontanaDotMap_{timestamp}.{fmt}"
+        file_path = os.path.join(downloads_path, filename)
+        
+        # Snapshot the map so the export renders off-screen on the worker
+        dots = self.current_dots
+        county_layer = self.county_layer
+        tile_cache = self.tile_cache if self.show_topo_background.get() else None
+        hillshade = self.hillshade if self.show_terrain_relief.get() else None
+        render_cache = self.render_cache
+        dot_color = self.dot_color_var.get()
+        show_county_lines = self.show_county_lines.get()
+        # The job builds its own rasterizer if the base map changed; it is kept once the export is saved
+        rasterizer = self._export_rasterizer
+
+        def export(job):
+            started = time.perf_counter()
+            job.progress("Rendering dot map...")
             
-        try:
-            import datetime
-            from pathlib import Path
-            import os
-            
-            # Get Downloads folder path
-            downloads_path = str(Path.home() / "Downloads")
-            
-            # Get current date and time in the desired format
-            now = datetime.datetime.now()
-            timestamp = now.strftime("%I_%M_%p_%m_%d_%Y")  # e.g., 12_49_PM_6_12_2025
+            extent = map_extent(county_layer.bounds)
+            pixels = (int(EXPORT_FIGSIZE[0] * EXPORT_DPI), int(EXPORT_FIGSIZE[1] * EXPORT_DPI))
+            background = relief = background_source = relief_source = None
+            if tile_cache is not None:
+                with diagnostics.span('download', 'background'):
+                    background = tile_cache.mosaic(extent, pixels)
+                    background_source = tile_cache.source(extent, pixels)
+            if hillshade is not None:
+                with diagnostics.span('download', 'relief'):
+                    relief = hillshade.relief(extent, pixels)
+                    relief_source = hillshade.source(extent, pixels)
             
-            # Create a meaningful filename
-            filename = f"MontanaDotMap_{timestamp}.tiff"
-            file_path = os.path.join(downloads_path, filename)
+            # An identical map exported before is copied from the render cache
+            with diagnostics.span('download', 'cache_lookup') as span:
+                key = render_cache.key(
+                    dots, background=background_source, relief=relief_source, bounds=county_layer.bounds,
+                    format=fmt, compression=compression, tiled=tiled, dpi=EXPORT_DPI,
+                    figsize=EXPORT_FIGSIZE, dot_color=dot_color, show_county_lines=show_county_lines
+                )
+                cached = render_cache.fetch(key, file_path)
+                span.set(cache='hit' if cached else 'miss', cache_hits=render_cache.hits, cache_misses=render_cache.misses)
+            if cached:
+                return file_path, os.path.getsize(file_path), time.perf_counter() - started, True, rasterizer
             
-            # Save the figure
-            self.figure.savefig(file_path, format="tiff", dpi=300, bbox_inches='tight')
+            job_rasterizer = rasterizer
+            if fmt in RASTER_FORMATS:
+                # Exports over the same base map reuse its raster
+                base_key = (county_layer, show_county_lines, background_source, relief_source)
+                if job_rasterizer is None or job_rasterizer[0] != base_key:
+                    with diagnostics.span('download', 'base_map'):
+                        job_rasterizer = (base_key, DotRasterizer(county_layer, show_county_lines, background, relief))
+                with diagnostics.span('download', 'render', rows_in=dots['count']):
+                    image = job_rasterizer[1].render(dots, dot_color)
+                
+                job.progress("Saving dot map...")
+                with diagnostics.span('download', 'save', format=fmt) as span:
+                    file_size = save_image(image, file_path, fmt, EXPORT_DPI, compression, tiled)
+                    span.set(bytes=file_size)
+            else:
+                # Off-screen figure at exactly the exported size
+                from matplotlib.backends.backend_agg import FigureCanvasAgg
+                from matplotlib.figure import Figure
+                with diagnostics.span('download', 'render', rows_in=dots['count']):
+                    figure = Figure(figsize=EXPORT_FIGSIZE, dpi=EXPORT_DPI)
+                    FigureCanvasAgg(figure)
+                    draw_dot_map(figure, dots, county_layer,
+                                 dot_color=dot_color, show_county_lines=show_county_lines,
+                                 background=background, relief=relief)
+                
+                # Save the figure
+                job.progress("Saving dot map...")
+                with diagnostics.span('download', 'save', format=fmt) as span:
+                    file_size = save_map(figure, file_path, fmt, EXPORT_DPI, compression, tiled)
+                    span.set(bytes=file_size)
+            render_cache.store(key, file_path)
+            return file_path, file_size, time.perf_counter() - started, False, job_rasterizer
+
+        def saved(result):
+            path, file_size, seconds, from_cache, export_rasterizer = result
+            self._export_rasterizer = export_rasterizer
             
             # Show toast notification
-            self.toast.show_toast(f"Dot map saved as {filename}")
+            source = ", from cache" if from_cache else ""
+            fallback = f" - {TILED_TIFF_FALLBACK}" if tiled_fallback else ""
+            self.toast.show_toast(f"Dot map saved as {filename} ({format_bytes(file_size)} in {seconds:.1f} s{source}){fallback}")
             
-            print(f"✅ TIFF dot map saved as '{file_path}'")
-            
-        except Exception as e:
-            messagebox.showerror("Error", 
-                f"Error saving file:\n{str(e)}\n\n"
+            print(f"✅ {fmt.upper()} dot map saved as '{path}'")
+
+        def failed(error):
+            messagebox.showerror("Error",
+                f"Error saving file:\n{str(error)}\n\n"
                 "Please try again."
             )
+        
+        self._run_job('export', "Saving dot map...", export, saved, failed)
 
-    def on_window_resize(self, event=None):
-        # Update the figure size to match the panel size
-        w = self.right_panel.winfo_width() / 100
-        h = self.right_panel.winfo_height() / 100
-        self.figure.set_size_inches(w, h)
+    def on_window_resize(self, event):
+        """Coalesce a burst of resize events into a single redraw once the size settles"""
+        # Skip events that don't change the map panel's size
+        size = (event.width, event.height)
+        if size == self._map_size:
+            return
+        self._map_size = size
+        self._resize_event = event
         
-        # If we have maps displayed, redraw them to maintain proper layout
-        if self.current_dots is not None:
-            self.display_dot_map()
-        else:
-            self.canvas.draw()
+        # Stretch the last frame over the panel until the real redraw happens
+        self._show_resize_preview(size)
+        
+        if self._resize_job is not None:
+            self.root.after_cancel(self._resize_job)
+        self._resize_job = self.root.after(self.RESIZE_SETTLE_MS, self._apply_resize)
+
+    def _apply_resize(self):
+        self._resize_job = None
+        self._hide_resize_preview()
+        
+        # Let matplotlib resize its drawing surface and the figure to match the panel.
+        # The redraw it schedules recaptures the blit background and draws the dots.
+        self.canvas.resize(self._resize_event)
+        self._resize_event = None
+
+    def _show_resize_preview(self, size):
+        from PIL import Image, ImageTk
+        widget = self.canvas.get_tk_widget()
+        if self._resize_preview is None:
+            try:
+                frame = Image.fromarray(np.asarray(self.canvas.buffer_rgba()).copy())
+            except Exception:
+                return  # Nothing rendered yet
+            self._resize_preview = {'frame': frame, 'image': None}
+        
+        width, height = max(size[0], 1), max(size[1], 1)
+        image = ImageTk.PhotoImage(self._resize_preview['frame'].resize((width, height), Image.NEAREST))
+        self._resize_preview['image'] = image  # Keep a reference so Tk doesn't drop it
+        widget.delete('resize_preview')
+        widget.create_image(0, 0, anchor='nw', image=image, tags='resize_preview')
+
+    def _hide_resize_preview(self):
+        self.canvas.get_tk_widget().delete('resize_preview')
+        self._resize_preview = None
+
+    @staticmethod
+    def _taxon_key(value, all_option):
+        """Dropdown value as a TaxonomyIndex name (None for the "All" option)"""
+        return None if value == all_option else value.strip().lower()
 
     def update_genus_dropdown(self, event=None):
         family = self.selected_family.get().strip()
@@ -986,17 +4283,8 @@ class MainApplication:
             self.genus_dropdown.set("Select Genus")
             return
         
-        # Filter based on family selection
-        if family == "All":
-            # Get all non-empty genus values
-            filtered = self.excel_data[self.excel_data["genus"].notna() & (self.excel_data["genus"].str.strip() != "")]
-        else:
-            # Get genus for specific family (case-insensitive)
-            filtered = self.excel_data[self.excel_data["family"].str.lower() == family.lower()]
-        
-        # Get valid genera (non-empty/non-null values)
-        valid_genera = sorted(filtered["genus"].dropna().unique())
-        valid_genera = [g for g in valid_genera if str(g).strip() and str(g).lower() != 'nan']  # Remove empty strings and 'nan'
+        # Get genera for the family selection (all non-empty genera for "All")
+        valid_genera = self.taxonomy.genera(self._taxon_key(family, "All"))
         
         # Create genus list with special options
         genus_values = ["All"] + [g.title() for g in valid_genera]
@@ -1018,24 +4306,11 @@ class MainApplication:
             self.species_dropdown.set("Select Species")
             return
         
-        # Start with base DataFrame
-        filtered = self.excel_data
-        
-        # Apply family filter
-        if family == "All":
-            filtered = filtered[filtered["family"].notna() & (filtered["family"].str.strip() != "")]
-        else:
-            filtered = filtered[filtered["family"].str.lower() == family.lower()]
-        
-        # Apply genus filter
-        if genus == "All":
-            filtered = filtered[filtered["genus"].notna() & (filtered["genus"].str.strip() != "")]
-        else:
-            filtered = filtered[filtered["genus"].str.lower() == genus.lower()]
-        
-        # Get valid species (non-empty/non-null values)
-        valid_species = sorted(filtered["species"].dropna().unique())
-        valid_species = [s for s in valid_species if str(s).strip() and str(s).lower() != 'nan']  # Remove empty strings and 'nan'
+        # Get species for the family and genus selection
+        valid_species = self.taxonomy.species(
+            self._taxon_key(family, "All"),
+            self._taxon_key(genus, "All")
+        )
         
         # Create species list with special options - note lowercase for species
         species_values = ["all"] + valid_species
@@ -1044,6 +4319,11 @@ class MainApplication:
         self.species_dropdown["values"] = species_values
         self.species_dropdown.set("Select Species")
 
+    def on_close(self):
+        """Cancel background jobs and close the application"""
+        self.worker.shutdown()
+        self.root.destroy()
+
     def run(self):
         self.root.mainloop()
 
@@ -1054,5 +4334,12 @@ if __name__ == "__main__":
         base = os.path.dirname(os.path.abspath(__file__))
     os.environ['GDAL_DATA'] = os.path.join(base, 'gdal-data')
     os.environ['PROJ_LIB'] = os.path.join(base, 'proj')
+    multiprocessing.freeze_support()
+    commands = {'batch': batch_main, 'seed-tiles': seed_tiles_main, 'benchmark': benchmark_main,
+                'startup': startup_main}
+    if len(sys.argv) > 1 and sys.argv[1] in commands:
+        sys.exit(commands[sys.argv[1]](sys.argv[2:]))
+    # Imported here rather than at the top so the commands above run without Tk
+    import tkinter.ttk, tkinter.filedialog, tkinter.messagebox  # noqa: F401
     app = MainApplication()
     app.run() 
\ No newline at end of file
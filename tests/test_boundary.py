@@ -0,0 +1,64 @@
+"""
+MontanaBoundary.contains_xy agrees with an exact point-in-polygon test,
+including for points right at the border.
+"""
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import Polygon
+
+import geopandas as gpd
+
+import montana_dot_mapper as mdm
+
+# A concave (L-shaped) outline with a lake, in lon/lat
+OUTLINE = Polygon(
+    [(-116, 44), (-104, 44), (-104, 46), (-110, 46), (-110, 49), (-116, 49)],
+    holes=[[(-114, 45), (-113, 45), (-113, 46), (-114, 46)]]
+)
+
+@pytest.fixture(scope='module')
+def boundary():
+    outline = gpd.GeoDataFrame(geometry=[OUTLINE], crs=mdm.WGS84_CRS)
+    return mdm.MontanaBoundary(outline, crs_list=(mdm.WGS84_CRS,))
+
+def test_contains_xy_matches_exact_test(boundary):
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-117, -103, 20000)
+    y = rng.uniform(43, 50, 20000)
+    expected = shapely.contains_xy(OUTLINE, x, y)
+    np.testing.assert_array_equal(boundary.contains_xy(x, y), expected)
+
+def test_contains_xy_at_the_border(boundary):
+    x = np.array([-112.0, -110.0, -110.0 - 1e-9, -110.0 + 1e-9, -113.5, -113.0 - 1e-9, -116.0, -104.0 - 1e-9])
+    y = np.array([46.0 - 1e-9, 47.0, 47.0, 47.0, 45.5, 45.5, 45.0, 45.0])
+    expected = shapely.contains_xy(OUTLINE, x, y)
+    assert expected.tolist() == [True, False, True, False, False, False, False, True]
+    np.testing.assert_array_equal(boundary.contains_xy(x, y), expected)
+
+def test_contains_xy_nan_is_outside(boundary):
+    result = boundary.contains_xy([np.nan, -112.0, -112.0], [46.5, np.nan, 46.5])
+    assert result.tolist() == [False, False, True]
+
+def test_montana_outline(monkeypatch, tmp_path):
+    monkeypatch.setenv('MONTANA_DOT_MAPPER_CACHE', str(tmp_path))
+    _, outline = mdm.load_montana_counties()
+    boundary = mdm.MontanaBoundary(outline)
+    places = {
+        'Helena': (-112.036, 46.589, True),
+        'Billings': (-108.500, 45.783, True),
+        'West Yellowstone': (-111.104, 44.662, True),
+        'Old Faithful, WY': (-110.828, 44.460, False),
+        'Spokane, WA': (-117.426, 47.659, False),
+        'Williston, ND': (-103.618, 48.147, False),
+    }
+    lon = np.array([place[0] for place in places.values()])
+    lat = np.array([place[1] for place in places.values()])
+    assert boundary.contains_xy(lon, lat).tolist() == [place[2] for place in places.values()]
+    
+    # Web Mercator and State Plane give the same answer as lon/lat
+    for crs in (mdm.WEB_MERCATOR_CRS, mdm.MONTANA_CRS):
+        x, y = mdm.project_xy(lon, lat, crs)
+        assert boundary.contains_xy(x, y, crs).tolist() == [place[2] for place in places.values()]
+        np.testing.assert_array_equal(boundary.contains_xy(x, y, crs),
+                                      shapely.contains_xy(boundary.geometry(crs), x, y))
@@ -0,0 +1,142 @@
+"""
+Vectorized coordinate parsing matches the original row-by-row
+``convert_coordinates`` on the awkward values found in real workbooks.
+"""
+import math
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import montana_dot_mapper as mdm
+
+def convert_coordinates(lat_val, lat_dir_val, long_val, long_dir_val):
+    """The original per-row conversion: (lon, lat), or None for a rejected row"""
+    def dms_to_decimal(coord):
+        if isinstance(coord, float) or isinstance(coord, int):
+            return float(coord)
+        if not isinstance(coord, str):
+            return float('nan')
+        coord = coord.replace("’", "'").replace("″", '"').replace("”", '"')
+        match = re.match(r"(\d+)[°\s]+(\d+(?:\.\d+)?)[\'′]?\s*(\d*(?:\.\d+)?)[\"″]?", coord.strip())
+        if match:
+            sec = float(match.group(3)) if match.group(3) else 0.0
+            return float(match.group(1)) + float(match.group(2)) / 60 + sec / 3600
+        try:
+            return float(coord)
+        except Exception:
+            return float('nan')
+
+    if pd.isna(lat_val) or pd.isna(long_val):
+        return None
+    lat, long = dms_to_decimal(lat_val), dms_to_decimal(long_val)
+    if math.isnan(lat) or math.isnan(long):
+        return None
+    lat_dir = lat_dir_val.strip().upper() if isinstance(lat_dir_val, str) else 'N'
+    long_dir = long_dir_val.strip().upper() if isinstance(long_dir_val, str) else 'W'
+    if long_dir not in ('E', 'W'):
+        long_dir = 'W'
+    if lat_dir == 'S':
+        lat = -lat
+    if long_dir == 'W':
+        long = -long
+    if not (44 <= abs(lat) <= 49 and 104 <= abs(long) <= 116):
+        return None
+    return long, lat
+
+ROWS = [
+    (46.5, 'N', 110.2, 'W'),
+    (46, 'N', 110, 'W'),
+    ('46.5', ' n ', '110.25', 'w'),
+    (" 45.75 ", None, "111.5", None),
+    ("44°41.576'", 'N', "111°02.5'", 'W'),
+    ('46°41\'59"', 'N', '113°5\'30"', 'W'),
+    ('46°41′59″', 'N', '113°5′30″', 'W'),
+    ('46°41’59”', 'N', '113°5’30”', 'W'),
+    ('45 30', 'N', '108 15.5', 'W'),
+    ('45 30 15', 'N', '108 15 30', 'W'),
+    (46.5, 'x', 110.2, 'up'),
+    (46.5, 'S', 110.2, 'E'),
+    (46.5, float('nan'), 110.2, float('nan')),
+    (np.nan, 'N', 110.2, 'W'),
+    (46.5, 'N', None, 'W'),
+    ('', 'N', '110', 'W'),
+    ('abc', 'N', '110', 'W'),
+    ('45°', 'N', '110', 'W'),
+    ('45.5N', 'N', '110', 'W'),
+    (50.1, 'N', 110.2, 'W'),
+    (46.5, 'N', 100.0, 'W'),
+    (44, 'N', 116, 'W'),
+    (True, 'N', 110.2, 'W'),
+]
+
+def rows_frame(rows):
+    return pd.DataFrame(rows, columns=mdm.COORDINATE_COLUMNS, dtype=object)
+
+def assert_matches_original(parsed, rows):
+    for i, row in enumerate(rows):
+        expected = convert_coordinates(*row)
+        if expected is None:
+            assert parsed.status[i] != mdm.COORD_OK, row
+            assert np.isnan(parsed.lon[i]) and np.isnan(parsed.lat[i]), row
+        else:
+            assert parsed.status[i] == mdm.COORD_OK, row
+            assert parsed.lon[i] == pytest.approx(expected[0], abs=1e-9), row
+            assert parsed.lat[i] == pytest.approx(expected[1], abs=1e-9), row
+
+def test_parse_coordinates_matches_convert_coordinates():
+    assert_matches_original(mdm.parse_coordinates(rows_frame(ROWS)), ROWS)
+
+def test_parse_coordinates_rejection_reasons():
+    parsed = mdm.parse_coordinates(rows_frame([
+        (np.nan, 'N', 110.2, 'W'),
+        ('abc', 'N', '110', 'W'),
+        (50.1, 'N', 110.2, 'W'),
+        (46.5, 'N', 110.2, 'W'),
+    ]))
+    assert parsed.status.tolist() == [
+        mdm.COORD_MISSING, mdm.COORD_UNPARSEABLE, mdm.COORD_OUT_OF_BOUNDS, mdm.COORD_OK
+    ]
+    assert parsed.rejection_counts() == {
+        "missing coordinates": 1,
+        "unreadable coordinates": 1,
+        "outside Montana's bounding box": 1,
+    }
+
+def test_parse_coordinates_numeric_columns():
+    # Columns read as floats (no text at all) skip the string parsing
+    data = pd.DataFrame({
+        'lat': [46.5, np.nan, 45.0],
+        'lat_dir': ['N', 'N', 'N'],
+        'long': [110.2, 110.0, 120.0],
+        'long_dir': ['W', 'W', 'W'],
+    })
+    parsed = mdm.parse_coordinates(data)
+    assert parsed.status.tolist() == [mdm.COORD_OK, mdm.COORD_MISSING, mdm.COORD_OUT_OF_BOUNDS]
+    assert (parsed.lon[0], parsed.lat[0]) == (-110.2, 46.5)
+
+def distinct_localities(rows):
+    # Blank cells (NaN or None) are all the same key
+    return len({tuple(None if pd.isna(value) else value for value in row) for row in rows})
+
+def test_coordinate_cache_parses_each_locality_once():
+    cache = mdm.CoordinateCache()
+    rows = ROWS * 3
+    parsed = cache.parse(rows_frame(rows))
+    assert len(cache) == distinct_localities(ROWS)
+    assert_matches_original(parsed, rows)
+    
+    # A later block reuses the table: only its unseen localities are added
+    later = [ROWS[0], ROWS[4], ('47 12.5', 'N', '112 30', 'W')]
+    parsed = cache.parse(rows_frame(later))
+    assert len(cache) == distinct_localities(ROWS) + 1
+    assert_matches_original(parsed, later)
+
+def test_coordinate_cache_matches_parse_coordinates():
+    data = rows_frame(ROWS[::-1] + ROWS)
+    cached = mdm.CoordinateCache().parse(data)
+    direct = mdm.parse_coordinates(data)
+    np.testing.assert_array_equal(cached.status, direct.status)
+    np.testing.assert_array_equal(cached.lon, direct.lon)
+    np.testing.assert_array_equal(cached.lat, direct.lat)
@@ -0,0 +1,68 @@
+"""
+Keys, hits, misses and least-recently-used eviction of the render cache.
+"""
+import os
+import time
+
+import numpy as np
+
+import montana_dot_mapper as mdm
+
+def make_dots(count, offset=0.0):
+    return {
+        'x': np.arange(count, dtype=float) + offset,
+        'y': np.arange(count, dtype=float),
+        'rows': np.arange(count, dtype=np.int64),
+        'count': count,
+    }
+
+def test_render_cache_key():
+    cache = mdm.RenderCache(cache_dir='unused')
+    dots = make_dots(50)
+    key = cache.key(dots, format='png', dpi=300)
+    assert key == cache.key(make_dots(50), dpi=300, format='png')
+    assert key != cache.key(make_dots(50, offset=1e-6), format='png', dpi=300)
+    assert key != cache.key(dots, format='png', dpi=600)
+    assert key != cache.key(dict(dots, species_info="Apidae > Bombus > huntii"), format='png', dpi=300)
+    # Only what is drawn counts, not which specimen rows the points came from
+    assert key == cache.key(dict(dots, rows=np.arange(50) + 7), format='png', dpi=300)
+
+def write(path, size):
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+
+def test_render_cache_fetch_and_store(tmp_path):
+    cache = mdm.RenderCache(cache_dir=str(tmp_path / 'renders'))
+    os.makedirs(cache.cache_dir)
+    key = cache.key(make_dots(10), format='png')
+    out = tmp_path / 'map.png'
+    assert not cache.fetch(key, str(out))
+    
+    write(out, 100)
+    cache.store(key, str(out))
+    copy = tmp_path / 'copy.png'
+    assert cache.fetch(key, str(copy))
+    assert copy.read_bytes() == out.read_bytes()
+    # The same key with another format is a different file
+    assert not cache.fetch(key, str(tmp_path / 'map.tiff'))
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries'], stats['bytes']) == (1, 2, 1, 100)
+
+def test_render_cache_evicts_least_recently_used(tmp_path):
+    cache = mdm.RenderCache(cache_dir=str(tmp_path / 'renders'), max_bytes=250)
+    os.makedirs(cache.cache_dir)
+    out = tmp_path / 'map.png'
+    write(out, 100)
+    keys = [cache.key(make_dots(10, offset=i), format='png') for i in range(3)]
+    now = time.time()
+    cache.store(keys[0], str(out))
+    cache.store(keys[1], str(out))
+    # Make the first entry the most recently used one
+    os.utime(cache._path(keys[1], str(out)), (now - 100, now - 100))
+    os.utime(cache._path(keys[0], str(out)), (now - 50, now - 50))
+    cache.store(keys[2], str(out))
+    
+    assert cache.fetch(keys[0], str(tmp_path / 'a.png'))
+    assert not cache.fetch(keys[1], str(tmp_path / 'b.png'))
+    assert cache.fetch(keys[2], str(tmp_path / 'c.png'))
+    assert cache.stats()['bytes'] == 200
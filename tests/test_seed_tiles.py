@@ -0,0 +1,69 @@
+"""
+``seed-tiles`` against a local tile server: the first run downloads every
+tile covering Montana, a second run finds them all cached.
+"""
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'montana_dot_mapper.py')
+TILE = b'\x89PNG\r\n\x1a\n test tile'
+
+class TileHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        TileHandler.requests.append(self.path)
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(TILE)))
+        self.end_headers()
+        self.wfile.write(TILE)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def tile_server():
+    TileHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TileHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/{{z}}/{{x}}/{{y}}.png"
+    server.shutdown()
+    server.server_close()
+
+def seed_tiles(url, cache_dir):
+    env = dict(os.environ, MONTANA_DOT_MAPPER_CACHE=str(cache_dir))
+    return subprocess.run(
+        [sys.executable, SCRIPT, 'seed-tiles', '--zoom', '5-6', '--url', url, '--workers', '2'],
+        env=env, capture_output=True, text=True, timeout=300
+    )
+
+def cached_tiles(cache_dir):
+    return sorted(
+        os.path.relpath(os.path.join(folder, name), cache_dir)
+        for folder, _, names in os.walk(cache_dir / 'tiles') for name in names
+    )
+
+def test_seed_tiles_downloads_then_skips_cached(tile_server, tmp_path):
+    first = seed_tiles(tile_server, tmp_path)
+    assert first.returncode == 0, first.stderr
+    tiles = cached_tiles(tmp_path)
+    assert tiles and all(path.endswith('.png') for path in tiles)
+    assert len(TileHandler.requests) == len(tiles)
+    for path in tiles:
+        with open(tmp_path / path, 'rb') as f:
+            assert f.read() == TILE
+    assert f"0 already cached, {len(tiles)} downloaded, 0 failed" in first.stdout
+
+    TileHandler.requests = []
+    second = seed_tiles(tile_server, tmp_path)
+    assert second.returncode == 0, second.stderr
+    assert TileHandler.requests == []
+    assert cached_tiles(tmp_path) == tiles
+    assert f"{len(tiles)} already cached, 0 downloaded, 0 failed" in second.stdout
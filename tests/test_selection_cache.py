@@ -0,0 +1,43 @@
+"""
+Hits, misses and least-recently-used eviction of the selection cache.
+"""
+import numpy as np
+
+import montana_dot_mapper as mdm
+
+def make_dots(count, offset=0.0):
+    return {
+        'x': np.arange(count, dtype=float) + offset,
+        'y': np.arange(count, dtype=float),
+        'rows': np.arange(count, dtype=np.int64),
+        'count': count,
+    }
+
+DOTS_BYTES = 3 * 8 * 100  # make_dots(100)
+
+def test_selection_cache_hits_and_misses():
+    cache = mdm.SelectionCache()
+    assert cache.get(('apidae', None, None)) is None
+    dots = make_dots(100)
+    cache.put(('apidae', None, None), dots)
+    assert cache.get(('apidae', None, None)) is dots
+    assert cache.get(('apidae', 'bombus', None)) is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries'], stats['bytes']) == (1, 2, 1, DOTS_BYTES)
+
+def test_selection_cache_evicts_least_recently_used():
+    cache = mdm.SelectionCache(max_bytes=2 * DOTS_BYTES)
+    cache.put('a', make_dots(100))
+    cache.put('b', make_dots(100))
+    cache.get('a')  # 'b' is now the least recently used
+    cache.put('c', make_dots(100))
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats()['bytes'] == 2 * DOTS_BYTES
+    
+    # Replacing an entry doesn't count it twice; anything over the budget isn't kept
+    cache.put('a', make_dots(100, offset=1.0))
+    assert cache.stats()['bytes'] == 2 * DOTS_BYTES
+    cache.put('big', make_dots(1000))
+    assert cache.get('big') is None
+    assert cache.stats()['entries'] == 2
@@ -0,0 +1,53 @@
+"""
+Merging nearby collection sites gives the connected components of the
+"within tolerance" graph, however the pairs are chunked.
+"""
+import numpy as np
+import pytest
+
+import montana_dot_mapper as mdm
+
+def brute_force_components(x, y, tolerance):
+    close = (x[:, None] - x[None, :]) ** 2 + (y[:, None] - y[None, :]) ** 2 <= tolerance ** 2
+    labels = np.full(len(x), -1)
+    for start in range(len(x)):
+        if labels[start] >= 0:
+            continue
+        labels[start] = start
+        stack = [start]
+        while stack:
+            for other in np.flatnonzero(close[stack.pop()] & (labels < 0)):
+                labels[other] = start
+                stack.append(other)
+    return labels
+
+def same_partition(a, b):
+    # Two labellings group the points the same way if each label maps to exactly one other label
+    pairs = set(zip(a.tolist(), b.tolist()))
+    return len(pairs) == len(set(a.tolist())) == len(set(b.tolist()))
+
+@pytest.mark.parametrize('tolerance', [50.0, 400.0, 2500.0])
+@pytest.mark.parametrize('chunk', [7, mdm.SITE_PAIR_CHUNK])
+def test_merge_matches_brute_force(tolerance, chunk):
+    rng = np.random.default_rng(1)
+    # Clustered sites in State Plane metres, as real collections are
+    centers = rng.uniform([250000, 50000], [1250000, 550000], size=(20, 2))
+    points = centers[rng.integers(0, len(centers), 600)] + rng.normal(scale=1500, size=(600, 2))
+    x, y = points[:, 0], points[:, 1]
+    labels = mdm.merge_nearby_points(x, y, tolerance, chunk=chunk)
+    assert same_partition(labels, brute_force_components(x, y, tolerance))
+
+def test_merge_across_cell_edges_and_chains():
+    tolerance = 100.0
+    # 2 m apart across a cell edge; a chain of 90 m steps; one point 101 m away from the chain
+    x = np.array([99.0, 101.0, 1000.0, 1090.0, 1180.0, 1281.0])
+    y = np.array([0.0, 0.0, 500.0, 500.0, 500.0, 500.0])
+    labels = mdm.merge_nearby_points(x, y, tolerance)
+    assert labels[0] == labels[1]
+    assert labels[2] == labels[3] == labels[4]
+    assert len({labels[0], labels[2], labels[5]}) == 3
+
+def test_merge_keeps_diagonal_cells_apart_beyond_tolerance():
+    # Opposite corners of neighbouring cells are up to 2√2 tolerances apart
+    labels = mdm.merge_nearby_points(np.array([1.0, 199.0]), np.array([1.0, 199.0]), 100.0)
+    assert labels[0] != labels[1]
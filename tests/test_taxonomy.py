@@ -0,0 +1,66 @@
+"""
+TaxonomyIndex lists and selections match filtering the specimen table
+directly, blank names included in "All".
+"""
+import numpy as np
+import pandas as pd
+
+import montana_dot_mapper as mdm
+
+RAW = pd.DataFrame({
+    'family': ['Megachilidae', 'megachilidae ', 'Apidae', 'Apidae', None, 'Apidae', 'Megachilidae', ''],
+    'genus': ['Megachile', 'Osmia', 'Bombus', 'Bombus', 'Bombus', None, 'Megachile', 'Osmia'],
+    'species': ['relativa', 'lignaria', 'huntii', 'huntii', 'huntii', 'sp.', np.nan, 'lignaria'],
+})
+
+def taxon_frame(raw=RAW):
+    return pd.DataFrame({col: mdm.normalized_taxon_categorical(raw[col]) for col in mdm.TAXON_COLUMNS})
+
+def expected_rows(family=None, genus=None, species=None):
+    names = RAW.apply(lambda col: col.fillna('').astype(str).str.strip().str.lower())
+    mask = np.ones(len(RAW), dtype=bool)
+    for col, name in zip(mdm.TAXON_COLUMNS, (family, genus, species)):
+        if name is not None:
+            mask &= (names[col] == name).to_numpy()
+    return np.flatnonzero(mask)
+
+def test_dropdown_lists_skip_blank_names():
+    index = mdm.TaxonomyIndex(taxon_frame())
+    assert index.families() == ['apidae', 'megachilidae']
+    assert index.genera() == ['bombus', 'megachile', 'osmia']
+    assert index.genera('apidae') == ['bombus']
+    assert index.species('megachilidae') == ['lignaria', 'relativa']
+    assert index.species('apidae', 'bombus') == ['huntii']
+    assert index.taxa() == [
+        ('apidae', 'bombus', 'huntii'),
+        ('megachilidae', 'megachile', 'relativa'),
+        ('megachilidae', 'osmia', 'lignaria'),
+    ]
+
+def test_rows_match_direct_filtering():
+    index = mdm.TaxonomyIndex(taxon_frame())
+    selections = [
+        (None, None, None),
+        ('apidae', None, None),
+        ('megachilidae', 'megachile', None),
+        ('apidae', 'bombus', 'huntii'),
+        (None, 'bombus', None),
+        (None, None, 'lignaria'),
+        ('megachilidae', None, 'relativa'),
+        ('pieridae', None, None),
+    ]
+    for selection in selections:
+        np.testing.assert_array_equal(index.rows(*selection), expected_rows(*selection))
+    
+    # "All" keeps the specimens with a blank family, genus or species
+    assert len(index.rows()) == len(RAW)
+
+def test_extend_in_blocks_matches_one_pass():
+    frame = taxon_frame()
+    streamed = mdm.TaxonomyIndex()
+    for start in range(0, len(frame), 3):
+        streamed.extend(frame.iloc[start:start + 3], offset=start)
+    whole = mdm.TaxonomyIndex(frame)
+    assert streamed.taxa() == whole.taxa()
+    for family in [None] + whole.families():
+        np.testing.assert_array_equal(streamed.rows(family), whole.rows(family))